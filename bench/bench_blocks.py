@@ -0,0 +1,67 @@
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from converters import BlockType, classify_block
+
+
+def multi_pass_block_to_block_type(markdown):
+    if markdown.startswith(('# ', '## ', '### ', '#### ', '##### ', '###### ')):
+        return BlockType.HEADING
+    if markdown.startswith('```') and markdown.endswith('```'):
+        return BlockType.CODE
+    if markdown.startswith('- '):
+        ul = True
+        for line in markdown.split('\n'):
+            if not line.startswith('- '):
+                ul = False
+        if ul:
+            return BlockType.UNORDERED_LIST
+    if markdown.startswith('>'):
+        quote = True
+        for line in markdown.split('\n'):
+            if not line.startswith('>'):
+                quote = False
+        if quote:
+            return BlockType.QUOTE
+    if markdown.startswith('1. '):
+        ol = True
+        count = 1
+        for line in markdown.split('\n'):
+            if not line.startswith(f'{count}. '):
+                ol = False
+            count += 1
+        if ol:
+            return BlockType.ORDERED_LIST
+    return BlockType.PARAGRAPH
+
+
+def multi_pass(block):
+    # Classification followed by the second split block_to_htmlnode used to do.
+    return multi_pass_block_to_block_type(block), block.split("\n")
+
+
+ITEMS = 5000
+CASES = {
+    "unordered list": "\n".join(f"- item {i}" for i in range(ITEMS)),
+    "ordered list": "\n".join(f"{i + 1}. item {i}" for i in range(ITEMS)),
+    "quote": "\n".join(f"> line {i}" for i in range(ITEMS)),
+    "broken list": "- first\nnot a list\n" + "\n".join(f"- item {i}" for i in range(ITEMS)),
+    "paragraph": "\n".join(f"line {i}" for i in range(ITEMS)),
+}
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    print(f"{'case':<16}{'multi-pass ms':>15}{'single-pass ms':>16}{'speedup':>10}")
+    for name, block in CASES.items():
+        assert multi_pass(block)[0] == classify_block(block)[0]
+        before = min(timeit.repeat(lambda: multi_pass(block), number=number, repeat=3)) / number
+        after = min(timeit.repeat(lambda: classify_block(block), number=number, repeat=3)) / number
+        print(f"{name:<16}{before * 1000:>15.3f}{after * 1000:>16.3f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from converters import split_nodes_delimiter, split_nodes_image, split_nodes_link, text_to_textnodes
+from textnode import TextNode, TextType
+
+
+def chained_text_to_textnodes(text):
+    new_nodes = split_nodes_delimiter([TextNode(text, TextType.TEXT)], "**", TextType.BOLD)
+    new_nodes = split_nodes_delimiter(new_nodes, "_", TextType.ITALIC)
+    new_nodes = split_nodes_delimiter(new_nodes, "`", TextType.CODE)
+    new_nodes = split_nodes_image(new_nodes)
+    new_nodes = split_nodes_link(new_nodes)
+    return new_nodes
+
+
+CASES = {
+    "link-heavy": " ".join(f"see [link {i}](https://example.com/{i}) and" for i in range(500)),
+    "link-heavy-5k": " ".join(f"see [link {i}](https://example.com/{i}) and" for i in range(5000)),
+    "image-heavy": " ".join(f"![image {i}](/images/{i}.png) caption" for i in range(500)),
+    "emphasis-heavy": " ".join(f"**bold {i}** _italic {i}_ `code {i}`" for i in range(500)),
+    "mixed": " ".join(f"**b** [l](/p/{i}) _i_ ![a](/i/{i}.png) `c`" for i in range(500)),
+    "plain": "lorem ipsum dolor sit amet " * 2000,
+}
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"{'case':<16}{'chained ms':>12}{'single-pass ms':>16}{'speedup':>10}")
+    for name, text in CASES.items():
+        assert chained_text_to_textnodes(text) == text_to_textnodes(text)
+        chained = min(timeit.repeat(lambda: chained_text_to_textnodes(text), number=number, repeat=3)) / number
+        single = min(timeit.repeat(lambda: text_to_textnodes(text), number=number, repeat=3)) / number
+        print(f"{name:<16}{chained * 1000:>12.3f}{single * 1000:>16.3f}{chained / single:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import os
+import random
+import sys
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+
+import converters
+from leafnode import LeafNode
+from parentnode import ParentNode
+from synth import make_page
+from textnode import TextNode, TextType
+
+
+# Subclassing a slotted class without __slots__ brings back the per-instance __dict__,
+# which is what every node carried before the node classes were slotted.
+class DictTextNode(TextNode):
+    pass
+
+
+class DictLeafNode(LeafNode):
+    pass
+
+
+class DictParentNode(ParentNode):
+    pass
+
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return size, result
+
+
+def count_nodes(node):
+    if node.children is None:
+        return 1
+    return 1 + sum(count_nodes(child) for child in node.children)
+
+
+def per_node(text_node_class, leaf_class, count=100000):
+    size, _ = measure(lambda: [text_node_class("word", TextType.TEXT) for _ in range(count)])
+    text_bytes = size / count
+    size, _ = measure(lambda: [leaf_class("b", "word") for _ in range(count)])
+    return text_bytes, size / count
+
+
+def per_page(markdown, classes):
+    saved = (converters.TextNode, converters.LeafNode, converters.ParentNode)
+    converters.TextNode, converters.LeafNode, converters.ParentNode = classes
+    try:
+        size, node = measure(lambda: converters.markdown_to_html_node(markdown))
+    finally:
+        converters.TextNode, converters.LeafNode, converters.ParentNode = saved
+    return size, count_nodes(node)
+
+
+def main():
+    rng = random.Random(0)
+    markdown = ""
+    index = 0
+    while len(markdown) < 2_000_000:
+        markdown += make_page(rng, "list-heavy", index) + "\n"
+        index += 1
+
+    dict_text, dict_leaf = per_node(DictTextNode, DictLeafNode)
+    slot_text, slot_leaf = per_node(TextNode, LeafNode)
+    print(f"{'':<18}{'__dict__':>12}{'__slots__':>12}{'saving':>9}")
+    print(f"{'TextNode bytes':<18}{dict_text:>12.0f}{slot_text:>12.0f}{1 - slot_text / dict_text:>9.0%}")
+    print(f"{'LeafNode bytes':<18}{dict_leaf:>12.0f}{slot_leaf:>12.0f}{1 - slot_leaf / dict_leaf:>9.0%}")
+
+    dict_page, nodes = per_page(markdown, (DictTextNode, DictLeafNode, DictParentNode))
+    slot_page, _ = per_page(markdown, (TextNode, LeafNode, ParentNode))
+    print(f"{'2 MB page MB':<18}{dict_page / 1e6:>12.1f}{slot_page / 1e6:>12.1f}{1 - slot_page / dict_page:>9.0%}")
+    print(f"({nodes} HTML nodes per page)")
+
+
+if __name__ == "__main__":
+    main()
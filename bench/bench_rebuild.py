@@ -0,0 +1,72 @@
+import os
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_watch import best_ms
+from devserver import SiteWatcher
+from feeds import generate_feeds
+from listings import generate_listings
+from manifest import BuildManifest
+from page_generator import collect_pages, generate_pages_recursive
+from page_index import PageIndex
+from postprocess import postprocess_site
+from synth import generate_site
+
+MODES = (
+    ("plain", {}),
+    ("listings", {"listing_options": {"section": "blog"}}),
+    ("site-url", {"site_url": "https://example.com"}),
+    ("minify+precompress", {"minify": True, "precompress": True}),
+)
+
+
+def build(root, options):
+    manifest = BuildManifest(os.path.join(root, ".manifest.json"))
+    index = PageIndex.build(collect_pages("content", "docs"), "docs")
+    generate_pages_recursive("content", "template.html", "docs", "/", manifest, index=index)
+    if "listing_options" in options:
+        generate_listings(index, "template.html", "docs", "/", manifest, **options["listing_options"])
+    if "site_url" in options:
+        generate_feeds(manifest, index, "template.html", "docs", "/", options["site_url"])
+    if options.get("minify") or options.get("precompress"):
+        postprocess_site(manifest, options.get("minify"), options.get("precompress"))
+    return SiteWatcher("/", manifest, index=index, **options)
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    number = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    print(f"{pages} pages")
+    print(f"{'mode':<20}{'one edit ms':>13}")
+    cwd = os.getcwd()
+    for mode, options in MODES:
+        with tempfile.TemporaryDirectory() as root:
+            generate_site(root, "small-posts", pages)
+            os.chdir(root)
+            try:
+                with open(os.devnull, "w") as devnull:
+                    stdout, sys.stdout = sys.stdout, devnull
+                    try:
+                        watcher = build(root, options)
+                        edited = os.path.join("content", "blog", "post0", "index.md")
+
+                        def edit():
+                            with open(edited, "a") as file:
+                                file.write("x")
+                            watcher.rebuild([edited], [])
+
+                        edit_ms = best_ms(edit, number)
+                        watcher.source.close()
+                    finally:
+                        sys.stdout = stdout
+            finally:
+                os.chdir(cwd)
+        print(f"{mode:<20}{edit_ms:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
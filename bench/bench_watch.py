@@ -0,0 +1,51 @@
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from file_watch import InotifyWatcher, SnapshotWatcher, _libc
+from synth import generate_site
+
+
+def best_ms(function, number):
+    best = None
+    for _ in range(number):
+        started = time.perf_counter()
+        function()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 40000
+    number = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    watcher_classes = [SnapshotWatcher] + ([InotifyWatcher] if _libc is not None else [])
+    with tempfile.TemporaryDirectory() as root:
+        generate_site(root, "small-posts", pages)
+        paths = [os.path.join(root, name) for name in ("content", "static", "template.html", "partials")]
+        edited = os.path.join(root, "content", "blog", "post0", "index.md")
+        print(f"{pages} pages")
+        print(f"{'watcher':<18}{'start ms':>10}{'idle poll ms':>14}{'one edit ms':>13}")
+        for watcher_class in watcher_classes:
+            started = time.perf_counter()
+            watcher = watcher_class(paths)
+            start_ms = (time.perf_counter() - started) * 1000
+            idle_ms = best_ms(watcher.changes, number)
+
+            def edit():
+                with open(edited, "a") as file:
+                    file.write("x")
+                assert watcher.changes() == ([edited], [])
+
+            edit_ms = best_ms(edit, number)
+            watcher.close()
+            print(f"{watcher_class.__name__:<18}{start_ms:>10.1f}{idle_ms:>14.3f}{edit_ms:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
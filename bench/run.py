@@ -0,0 +1,150 @@
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from synth import SHAPES, generate_site
+
+
+BENCHMARKS = ("markdown_to_html_node", "text_to_textnodes", "to_html", "markdown_to_html", "build")
+RESULTS_PATH = os.path.join(BENCH_DIR, "results.jsonl")
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def read_sources(root):
+    sources = []
+    for path in sorted(glob.glob(os.path.join(root, "content", "**", "*.md"), recursive=True)):
+        with open(path) as file:
+            sources.append(file.read())
+    return sources
+
+
+def run_benchmark(name, root):
+    from converters import markdown_to_blocks, markdown_to_html, markdown_to_html_node, text_to_textnodes
+
+    sources = read_sources(root)
+    total_bytes = sum(len(source.encode()) for source in sources)
+    if name == "markdown_to_html_node":
+        started = time.perf_counter()
+        for source in sources:
+            markdown_to_html_node(source)
+    elif name == "text_to_textnodes":
+        blocks = [block for source in sources for block in markdown_to_blocks(source)]
+        started = time.perf_counter()
+        for block in blocks:
+            for line in block.split("\n"):
+                if not line.startswith("```"):
+                    text_to_textnodes(line)
+    elif name == "to_html":
+        nodes = [markdown_to_html_node(source) for source in sources]
+        started = time.perf_counter()
+        for node in nodes:
+            node.to_html()
+    elif name == "markdown_to_html":
+        started = time.perf_counter()
+        for source in sources:
+            markdown_to_html(source)
+    elif name == "build":
+        import main
+        os.chdir(root)
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.main(["--force"])
+    else:
+        raise ValueError(f"Unknown benchmark '{name}'")
+    elapsed = time.perf_counter() - started
+    return {
+        "seconds": elapsed,
+        "pages_per_sec": len(sources) / elapsed,
+        "mb_per_sec": total_bytes / elapsed / 1e6,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_child(name, shape, pages):
+    # Each benchmark runs in its own process so peak RSS is not polluted by earlier runs.
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", name, "--shapes", shape, "--pages", str(pages)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+            check=True, capture_output=True, text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def previous_results(path, commit):
+    previous = {}
+    if not os.path.exists(path):
+        return previous
+    with open(path) as file:
+        for line in file:
+            result = json.loads(line)
+            if result["commit"] != commit:
+                previous[(result["benchmark"], result["shape"], result["pages"])] = result
+    return previous
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the site generator on synthetic content")
+    parser.add_argument("--benchmarks", default=",".join(BENCHMARKS))
+    parser.add_argument("--shapes", default=",".join(SHAPES))
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--results", default=RESULTS_PATH)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        with tempfile.TemporaryDirectory() as root:
+            generate_site(root, args.shapes, args.pages)
+            print(json.dumps(run_benchmark(args.child, root)))
+        return
+
+    commit = git_commit()
+    previous = previous_results(args.results, commit)
+    print(f"{'benchmark':<24}{'shape':<14}{'pages/s':>10}{'MB/s':>8}{'RSS MB':>8}{'vs prev':>9}")
+    with open(args.results, "a") as results:
+        for shape in args.shapes.split(","):
+            for name in args.benchmarks.split(","):
+                result = run_child(name, shape, args.pages)
+                result.update({
+                    "benchmark": name,
+                    "shape": shape,
+                    "pages": args.pages,
+                    "commit": commit,
+                    "timestamp": time.time(),
+                })
+                results.write(json.dumps(result) + "\n")
+                change = ""
+                before = previous.get((name, shape, args.pages))
+                if before is not None:
+                    change = f"{result['pages_per_sec'] / before['pages_per_sec'] - 1:+.0%}"
+                print(
+                    f"{name:<24}{shape:<14}{result['pages_per_sec']:>10.1f}"
+                    f"{result['mb_per_sec']:>8.2f}{result['peak_rss_mb']:>8.1f}{change:>9}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import os
+import random
+
+
+SHAPES = ("small-posts", "huge-posts", "list-heavy", "link-heavy", "deep-nesting")
+
+WORDS = (
+    "hobbit ring shire elf dwarf wizard mountain river forest tower king road "
+    "journey shadow light sword song star council gate bridge fellowship"
+).split()
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+
+def sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def paragraph(rng, sentences=4):
+    parts = []
+    for _ in range(sentences):
+        text = sentence(rng)
+        roll = rng.random()
+        if roll < 0.2:
+            text += f" with **{rng.choice(WORDS)}** and _{rng.choice(WORDS)}_"
+        elif roll < 0.3:
+            text += f" and `{rng.choice(WORDS)}()`"
+        parts.append(text + ".")
+    return "\n".join(parts)
+
+
+def list_block(rng, items, ordered=False):
+    lines = []
+    for i in range(items):
+        marker = f"{i + 1}. " if ordered else "- "
+        lines.append(marker + sentence(rng, 6))
+    return "\n".join(lines)
+
+
+def link_paragraph(rng, links):
+    parts = []
+    for i in range(links):
+        word = rng.choice(WORDS)
+        if i % 10 == 0:
+            parts.append(f"![{word}](/images/{word}.png)")
+        else:
+            parts.append(f"see [{word} {i}](/blog/{word}-{i})")
+    return " ".join(parts)
+
+
+def make_page(rng, shape, index):
+    blocks = [f"# {sentence(rng, 4).title()} {index}"]
+    if shape == "huge-posts":
+        for i in range(400):
+            blocks.append(paragraph(rng, 6) if i % 5 else list_block(rng, 10))
+    elif shape == "list-heavy":
+        for i in range(10):
+            blocks.append(list_block(rng, 200, ordered=i % 2 == 1))
+    elif shape == "link-heavy":
+        for _ in range(10):
+            blocks.append(link_paragraph(rng, 100))
+    else:
+        for _ in range(5):
+            blocks.append(paragraph(rng))
+        blocks.append(list_block(rng, 5))
+        blocks.append("> " + sentence(rng) + "\n> " + sentence(rng))
+        blocks.append("```\n" + sentence(rng) + "\n```")
+    return "\n\n".join(blocks) + "\n"
+
+
+def page_path(content_dir, shape, index):
+    if shape == "deep-nesting":
+        parts = [f"level{(index >> shift) % 4}" for shift in range(0, 16, 2)]
+        return os.path.join(content_dir, *parts, f"page{index}", "index.md")
+    return os.path.join(content_dir, "blog", f"post{index}", "index.md")
+
+
+def generate_site(root, shape="small-posts", pages=100, seed=0):
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown shape '{shape}', expected one of {', '.join(SHAPES)}")
+    rng = random.Random(seed)
+    content_dir = os.path.join(root, "content")
+    total_bytes = 0
+    for index in range(pages):
+        path = page_path(content_dir, shape, index)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        markdown = make_page(rng, shape, index)
+        with open(path, "w") as file:
+            file.write(markdown)
+        total_bytes += len(markdown.encode())
+    os.makedirs(os.path.join(root, "static", "images"), exist_ok=True)
+    with open(os.path.join(root, "static", "index.css"), "w") as file:
+        file.write("body { margin: 0; }\n")
+    with open(os.path.join(root, "template.html"), "w") as file:
+        file.write(TEMPLATE)
+    return total_bytes
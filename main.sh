@@ -1,2 +1 @@
-python3 src/main.py
-cd docs && python3 -m http.server 8888
+python3 src/main.py --serve --port 8888
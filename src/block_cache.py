@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+
+BLOCK_CACHE_PATH = os.path.join(".cache", "blocks.json")
+BLOCK_CACHE_VERSION = 4
+
+
+def block_key(block):
+    return hashlib.sha1(block.encode()).hexdigest()
+
+
+class BlockCache():
+    def __init__(self, maxsize=4096, path=None, record_added=False):
+        self.maxsize = maxsize
+        self.path = path
+        self.record_added = record_added
+        self.entries = OrderedDict()
+        self.added = {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, maxsize=4096, path=BLOCK_CACHE_PATH, record_added=False):
+        cache = cls(maxsize, path, record_added)
+        if path is None or not os.path.exists(path):
+            return cache
+        try:
+            with open(path) as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return cache
+        if data.get("version") == BLOCK_CACHE_VERSION:
+            for key, entry in data.get("entries", []):
+                cache.store(key, tuple(entry))
+        return cache
+
+    def save(self):
+        if self.path is None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as file:
+            json.dump({"version": BLOCK_CACHE_VERSION, "entries": list(self.entries.items())}, file)
+        os.replace(tmp_path, self.path)
+
+    def get(self, block):
+        key = block_key(block)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, block, entry):
+        key = block_key(block)
+        self.store(key, entry)
+        if self.record_added:
+            self.added[key] = entry
+
+    def store(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def drain(self):
+        delta = (self.added, self.hits, self.misses)
+        self.added = {}
+        self.hits = 0
+        self.misses = 0
+        return delta
+
+    def merge(self, delta):
+        added, hits, misses = delta
+        for key, entry in added.items():
+            self.store(key, entry)
+        self.hits += hits
+        self.misses += misses
+
+    def stats(self):
+        total = self.hits + self.misses
+        hit_rate = self.hits / total if total else 0.0
+        return f"Block cache: {self.hits} hits, {self.misses} misses ({hit_rate:.1%} hit rate), {len(self.entries)} entries"
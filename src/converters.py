@@ -1,8 +1,13 @@
+import os
 import re
 from textnode import TextNode, TextType
 from leafnode import LeafNode
 from enum import Enum
+from highlight import highlight_code, parse_info
+from manifest import hash_file
 from parentnode import ParentNode
+from profiler import stage
+from render_context import get_render_context
 
 
 class BlockType(Enum):
@@ -12,6 +17,27 @@ class BlockType(Enum):
     QUOTE = "blockquote"
     UNORDERED_LIST = "ul"
     ORDERED_LIST = "ol"
+    INCLUDE = "include"
+
+
+INCLUDE_RE = re.compile(r'\{\{<\s*include\s+"?([^"\s<>]+)"?\s*>\}\}')
+
+
+def link_props(text_node):
+    links = get_render_context().links
+    if links is not None:
+        links.append(("link", text_node.url))
+    return {"href": text_node.url}
+
+
+def image_props(text_node):
+    context = get_render_context()
+    if context.links is not None:
+        context.links.append(("image", text_node.url))
+    props = {"src": text_node.url, "alt": text_node.text}
+    if context.image_attrs is not None:
+        props.update(context.image_attrs.get(text_node.url, {"loading": "lazy"}))
+    return props
 
 
 def text_node_to_html_node(text_node):
@@ -28,9 +54,9 @@ def text_node_to_html_node(text_node):
         case TextType.CODE:
             return LeafNode("code", text_node.text)
         case TextType.LINK:
-            return LeafNode("a", text_node.text, {"href": text_node.url})
+            return LeafNode("a", text_node.text, link_props(text_node))
         case TextType.IMAGE:
-            return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+            return LeafNode("img", "", image_props(text_node))
 
     raise Exception("text_node does not have a valid text_type")
 
@@ -108,121 +134,417 @@ def split_nodes_link(old_nodes):
     return new_nodes
 
 
+INLINE_TOKEN_RE = re.compile(r"[*_`!\[]")
+IMAGE_RE = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_RE = re.compile(r"\[([^\[\]]*)\]\(([^\(\)]*)\)")
+INLINE_DELIMITERS = {
+    "**": TextType.BOLD,
+    "_": TextType.ITALIC,
+    "`": TextType.CODE,
+}
+
+
 def text_to_textnodes(text):
-    new_nodes = split_nodes_delimiter([TextNode(text, TextType.TEXT)], "**", TextType.BOLD)
-    new_nodes = split_nodes_delimiter(new_nodes, "_", TextType.ITALIC)
-    new_nodes = split_nodes_delimiter(new_nodes, "`", TextType.CODE)
-    new_nodes = split_nodes_image(new_nodes)
-    new_nodes = split_nodes_link(new_nodes)
-    return new_nodes
+    with stage("text_to_textnodes"):
+        nodes = scan_inline(text)
+    texts = get_render_context().texts
+    if texts is not None:
+        texts.extend(node.text for node in nodes)
+    return nodes
 
 
-def markdown_to_blocks(markdown):
-    blocks = markdown.split("\n\n")
+def scan_inline(text):
     new_nodes = []
-    for block in blocks:
-        block = block.strip()
-        if len(block) > 0:
-            new_nodes.append(block)
+    text_start = 0
+    pos = 0
+    while True:
+        token = INLINE_TOKEN_RE.search(text, pos)
+        if token is None:
+            break
+        start = token.start()
+        char = token.group()
+        if char == "*":
+            if not text.startswith("**", start):
+                pos = start + 1
+                continue
+            char = "**"
+        if char in INLINE_DELIMITERS:
+            end = text.find(char, start + len(char))
+            if end == -1:
+                raise Exception(f"Invalid markdown syntax: Not every delimiter '{char}' was matched!")
+            node = TextNode(text[start + len(char):end], INLINE_DELIMITERS[char])
+            pos = end + len(char)
+        else:
+            if char == "!":
+                match = IMAGE_RE.match(text, start)
+                text_type = TextType.IMAGE
+            else:
+                match = LINK_RE.match(text, start)
+                text_type = TextType.LINK
+            if match is None:
+                pos = start + 1
+                continue
+            node = TextNode(match.group(1), text_type, match.group(2))
+            pos = match.end()
+        if start > text_start:
+            new_nodes.append(TextNode(text[text_start:start], TextType.TEXT))
+        new_nodes.append(node)
+        text_start = pos
+    if len(text) > text_start:
+        new_nodes.append(TextNode(text[text_start:], TextType.TEXT))
     return new_nodes
 
 
+def iter_blocks(lines):
+    block = []
+    in_fence = False
+    for line in lines:
+        line = line.rstrip("\n")
+        stripped = line.strip()
+        if in_fence:
+            if stripped.endswith("```"):
+                in_fence = False
+        elif stripped.startswith("```"):
+            in_fence = len(stripped) < 6 or not stripped.endswith("```")
+        elif line == "":
+            text = "\n".join(block).strip()
+            if len(text) > 0:
+                yield text
+            block = []
+            continue
+        block.append(line)
+    text = "\n".join(block).strip()
+    if len(text) > 0:
+        yield text
+
+
+def markdown_to_blocks(markdown):
+    return list(iter_blocks(markdown.split("\n")))
+
+
+HEADING_PREFIXES = ('# ', '## ', '### ', '#### ', '##### ', '###### ')
+
+
 def block_to_block_type(markdown):
-    if markdown.startswith(('# ', '## ', '### ', '#### ', '##### ', '##### ', '###### ')):
-        return BlockType.HEADING
+    with stage("block_to_block_type"):
+        return classify_block(markdown)[0]
+
+
+def classify_block(markdown):
+    if markdown.startswith("{{<") and INCLUDE_RE.fullmatch(markdown):
+        return BlockType.INCLUDE, None
+    if markdown.startswith(HEADING_PREFIXES):
+        return BlockType.HEADING, None
     if markdown.startswith('```') and markdown.endswith('```'):
-        return BlockType.CODE
+        return BlockType.CODE, None
+    lines = markdown.split('\n')
     if markdown.startswith('- '):
-        ul = True
-        for line in markdown.split('\n'):
+        for line in lines:
             if not line.startswith('- '):
-                ul = False
-        if ul:
-            return BlockType.UNORDERED_LIST
+                return BlockType.PARAGRAPH, lines
+        return BlockType.UNORDERED_LIST, lines
     if markdown.startswith('>'):
-        quote = True
-        for line in markdown.split('\n'):
+        for line in lines:
             if not line.startswith('>'):
-                quote = False
-        if quote:
-            return BlockType.QUOTE
+                return BlockType.PARAGRAPH, lines
+        return BlockType.QUOTE, lines
     if markdown.startswith('1. '):
-        ol = True
         count = 1
-        for line in markdown.split('\n'):
+        for line in lines:
             if not line.startswith(f'{count}. '):
-                ol = False
+                return BlockType.PARAGRAPH, lines
             count += 1
-        if ol:
-            return BlockType.ORDERED_LIST
-    return BlockType.PARAGRAPH
+        return BlockType.ORDERED_LIST, lines
+    return BlockType.PARAGRAPH, lines
 
 
-def block_to_htmlnode(block):
-    block_type = block_to_block_type(block)
+class BlockRenderer():
+    # Visitor over the parsed block stream: render_block classifies and splits each block, hands every inline
+    # TextNode to span() and passes the rendered spans to the method for the block type.
+    def span(self, text_node):
+        raise NotImplementedError
+
+    def paragraph(self, spans):
+        raise NotImplementedError
+
+    def heading(self, level, spans):
+        raise NotImplementedError
+
+    def code(self, text, language=None):
+        raise NotImplementedError
+
+    def quote(self, lines):
+        raise NotImplementedError
+
+    def unordered_list(self, items):
+        raise NotImplementedError
+
+    def ordered_list(self, items):
+        raise NotImplementedError
+
+    def partial(self, html):
+        raise NotImplementedError
+
+    def document(self, blocks):
+        raise NotImplementedError
+
+
+class TreeRenderer(BlockRenderer):
+    def span(self, text_node):
+        return text_node_to_html_node(text_node)
+
+    def paragraph(self, spans):
+        return ParentNode("p", spans)
+
+    def heading(self, level, spans):
+        return ParentNode(f"h{level}", spans)
+
+    def code(self, text, language=None):
+        if language is None:
+            return ParentNode("pre", [text_node_to_html_node(TextNode(text, TextType.CODE))])
+        return ParentNode("pre", [LeafNode("code", highlighted_code(text, language), {"class": f"language-{language}"})])
+
+    def quote(self, lines):
+        return ParentNode("blockquote", [span for spans in lines for span in spans])
+
+    def unordered_list(self, items):
+        return ParentNode("ul", [ParentNode("li", spans) for spans in items])
+
+    def ordered_list(self, items):
+        return ParentNode("ol", [ParentNode("li", spans) for spans in items])
+
+    def partial(self, html):
+        return LeafNode(None, html)
+
+    def document(self, blocks):
+        return ParentNode("div", blocks)
+
+
+def highlighted_code(text, language):
+    with stage("highlight"):
+        html = highlight_code(text, language)
+    return html if html is not None else text
+
+
+def split_fence(block):
+    # The info string after the opening fence names the language; without one the block keeps its old rendering.
+    inner = block[3:-3]
+    newline = inner.find("\n")
+    info = inner[:newline].strip() if newline >= 0 else ""
+    if not info:
+        return inner.lstrip(), None
+    return inner[newline + 1:], parse_info(info)
+
+
+def props_html(props):
+    return "".join([f' {key}="{value}"' for key, value in props.items()])
+
+
+def element_html(tag, parts):
+    if not parts:
+        raise ValueError("parent does not have children")
+    return f"<{tag}>{''.join(parts)}</{tag}>"
+
+
+class HtmlRenderer(BlockRenderer):
+    # Produces the same markup as TreeRenderer(...).to_html() without building the HTMLNode tree.
+    def span(self, text_node):
+        match text_node.text_type:
+            case TextType.TEXT:
+                return text_node.text
+            case TextType.BOLD:
+                return f"<b>{text_node.text}</b>"
+            case TextType.ITALIC:
+                return f"<i>{text_node.text}</i>"
+            case TextType.CODE:
+                return f"<code>{text_node.text}</code>"
+            case TextType.LINK:
+                return f"<a{props_html(link_props(text_node))}>{text_node.text}</a>"
+            case TextType.IMAGE:
+                return f"<img{props_html(image_props(text_node))}></img>"
+        raise Exception("text_node does not have a valid text_type")
+
+    def paragraph(self, spans):
+        return element_html("p", spans)
+
+    def heading(self, level, spans):
+        return element_html(f"h{level}", spans)
+
+    def code(self, text, language=None):
+        if language is None:
+            return f"<pre><code>{text}</code></pre>"
+        return f'<pre><code class="language-{language}">{highlighted_code(text, language)}</code></pre>'
+
+    def quote(self, lines):
+        return element_html("blockquote", [span for spans in lines for span in spans])
+
+    def unordered_list(self, items):
+        return element_html("ul", [element_html("li", spans) for spans in items])
+
+    def ordered_list(self, items):
+        return element_html("ol", [element_html("li", spans) for spans in items])
+
+    def partial(self, html):
+        return html
+
+    def document(self, blocks):
+        return element_html("div", blocks)
+
+
+TREE_RENDERER = TreeRenderer()
+HTML_RENDERER = HtmlRenderer()
+
+
+def render_spans(renderer, text):
+    return [renderer.span(text_node) for text_node in text_to_textnodes(text)]
+
+
+def render_block(block, renderer=TREE_RENDERER):
+    with stage("block_to_block_type"):
+        block_type, lines = classify_block(block)
     match block_type:
         case BlockType.PARAGRAPH:
-            node = ParentNode("p", [])
-            parts = []
-            for line in block.split("\n"):
-                parts.append(line.strip())
-            textnodes = text_to_textnodes(" ".join(parts))
-            for textnode in textnodes:
-                node.children.append(text_node_to_html_node(textnode))
-            return node
+            return renderer.paragraph(render_spans(renderer, " ".join([line.strip() for line in lines])))
         case BlockType.UNORDERED_LIST:
-            node = ParentNode("ul", [])
-            for line in block.split("\n"):
-                child = ParentNode("li", [])
-                textnodes = text_to_textnodes(line[2:])
-                for textnode in textnodes:
-                    child.children.append(text_node_to_html_node(textnode))
-                node.children.append(child)
-            return node
+            return renderer.unordered_list([render_spans(renderer, line[2:]) for line in lines])
         case BlockType.ORDERED_LIST:
-            node = ParentNode("ol", [])
-            for line in block.split("\n"):
-                child = ParentNode("li", [])
-                textnodes = text_to_textnodes(line.split('. ', 1)[1])
-                for textnode in textnodes:
-                    child.children.append(text_node_to_html_node(textnode))
-                node.children.append(child)
-            return node
+            return renderer.ordered_list([
+                render_spans(renderer, line[len(str(count)) + 2:]) for count, line in enumerate(lines, 1)
+            ])
         case BlockType.QUOTE:
-            node = ParentNode("blockquote", [])
-            for line in block.split("\n"):
-                textnodes = text_to_textnodes(line[2:])
-                for textnode in textnodes:
-                    node.children.append(text_node_to_html_node(textnode))
-            return node
+            return renderer.quote([render_spans(renderer, line[2:]) for line in lines])
         case BlockType.HEADING:
-            node = ParentNode(None, [])
-            if block.startswith("# "):
-                node.tag = "h1"
-            if block.startswith("## "):
-                node.tag = "h2"
-            if block.startswith("### "):
-                node.tag = "h3"
-            if block.startswith("#### "):
-                node.tag = "h4"
-            if block.startswith("##### "):
-                node.tag = "h5"
-            if block.startswith("###### "):
-                node.tag = "h6"
-            textnodes = text_to_textnodes(block.split(" ", 1)[1])
-            for textnode in textnodes:
-                node.children.append(text_node_to_html_node(textnode))
-            return node
+            level = block.index(" ")
+            return renderer.heading(level, render_spans(renderer, block[level + 1:]))
         case BlockType.CODE:
-            node = ParentNode("pre", [])
-            child = text_node_to_html_node(TextNode(block[3:-3].lstrip(), TextType.CODE))
-            node.children.append(child)
-            return node
+            return renderer.code(*split_fence(block))
+        case BlockType.INCLUDE:
+            return renderer.partial(include_html(INCLUDE_RE.fullmatch(block).group(1)))
+
+
+def partial_path(name):
+    partials_dir = get_render_context().partials_dir
+    path = os.path.normpath(os.path.join(partials_dir, name))
+    if os.path.relpath(path, partials_dir).startswith(os.pardir):
+        raise Exception(f"Include {name} is outside {partials_dir}")
+    return path
+
+
+def partial_is_current(entry, digest):
+    # The rendered HTML embeds every nested partial too, so all of their hashes have to match.
+    if entry is None or entry[0] != digest:
+        return False
+    for path, nested_digest in entry[4]:
+        if not os.path.exists(path) or hash_file(path) != nested_digest:
+            return False
+    return True
+
+
+def include_html(name):
+    # A partial is parsed and rendered once per process and reused while its own and its nested partials'
+    # content hashes are unchanged; every page that splices it in records each (path, hash) it used.
+    context = get_render_context()
+    path = partial_path(name)
+    if path in context.partial_stack:
+        raise Exception(f"Include cycle: {' -> '.join(context.partial_stack + [path])}")
+    with stage("include"):
+        digest = hash_file(path)
+        entry = context.partials.get(path)
+        if not partial_is_current(entry, digest):
+            with open(path) as file:
+                markdown = file.read()
+            links = []
+            texts = []
+            includes = []
+            previous = context.collect(links, texts, includes)
+            context.partial_stack.append(path)
+            try:
+                html = "".join(block_to_html(block) for block in markdown_to_blocks(markdown))
+            finally:
+                context.partial_stack.pop()
+                context.collect(*previous)
+            entry = (digest, html, links, texts, includes)
+            # Same rule as the block cache: image attributes are not part of the partial's text.
+            if context.image_attrs is None or "![" not in markdown:
+                context.partials[path] = entry
+    _, html, links, texts, includes = entry
+    if context.links is not None:
+        context.links.extend(links)
+    if context.texts is not None:
+        context.texts.extend(texts)
+    if context.includes is not None:
+        context.includes.append((path, digest))
+        context.includes.extend(includes)
+    return html
+
+
+def cached_block(block):
+    context = get_render_context()
+    entry = context.block_cache.get(block)
+    if entry is None:
+        links = []
+        texts = []
+        previous = context.collect(links, texts, context.includes)
+        try:
+            html = render_block(block, HTML_RENDERER)
+        finally:
+            context.collect(*previous)
+        entry = (html, links, texts)
+        context.block_cache.put(block, entry)
+    html, links, texts = entry
+    if context.links is not None:
+        context.links.extend(tuple(link) for link in links)
+    if context.texts is not None:
+        context.texts.extend(texts)
+    return html
+
+
+def uses_block_cache(block):
+    # Image attributes come from the image pipeline and includes from the partial rather than the block text,
+    # so those blocks are not cached.
+    context = get_render_context()
+    return (
+        context.block_cache is not None
+        and (context.image_attrs is None or "![" not in block)
+        and not block.startswith("{{<")
+    )
+
+
+def block_to_htmlnode(block):
+    if not uses_block_cache(block):
+        return render_block(block)
+    return LeafNode(None, cached_block(block))
+
+
+def block_to_html(block, renderer=HTML_RENDERER):
+    if renderer is not HTML_RENDERER or not uses_block_cache(block):
+        return render_block(block, renderer)
+    return cached_block(block)
 
 
 def markdown_to_html_node(markdown):
     node = ParentNode("div", [])
-    blocks = markdown_to_blocks(markdown)
-    for block in blocks:
-        node.children.append(block_to_htmlnode(block))
+    with stage("markdown_to_blocks"):
+        blocks = markdown_to_blocks(markdown)
+    with stage("html_tree"):
+        for block in blocks:
+            node.children.append(block_to_htmlnode(block))
     return node
+
+
+def iter_blocks_html(blocks):
+    empty = True
+    yield "<div>"
+    for block in blocks:
+        empty = False
+        yield block_to_html(block)
+    if empty:
+        raise ValueError("parent does not have children")
+    yield "</div>"
+
+
+def markdown_to_html(markdown, renderer=HTML_RENDERER):
+    with stage("markdown_to_blocks"):
+        blocks = markdown_to_blocks(markdown)
+    with stage("to_html"):
+        return renderer.document([block_to_html(block, renderer) for block in blocks])
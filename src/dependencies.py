@@ -0,0 +1,62 @@
+import json
+import os
+from manifest import hash_bytes, hash_file
+
+
+def dependency(kind, target):
+    return f"{kind}:{target}"
+
+
+def content_digest(deps):
+    # Digest of the inputs that make up a page's text, its source and every partial it includes, but not the
+    # template or options; the search index uses it to tell which pages need their terms merged again.
+    parts = sorted([dep, digest] for dep, digest in deps.items() if dep.startswith(("source:", "partial:")))
+    return hash_bytes(json.dumps(parts).encode())
+
+
+def describe(dep, digest):
+    kind, _, target = dep.partition(":")
+    if kind == "option":
+        return f"{target} changed"
+    if digest is None:
+        return f"{kind} {target} removed"
+    return f"{kind} {target} changed"
+
+
+class DependencyResolver():
+    # Every output records the digest of each input it consumed; a page is rebuilt only when one of
+    # those digests differs. Digests are memoized, so a shared template is hashed once per build.
+    def __init__(self, index, template_path, basepath, image_attrs=None):
+        self.index = index
+        self.template_path = template_path
+        self.basepath = basepath
+        self.image_attrs = image_attrs
+        self.digests = {}
+
+    def digest(self, dep):
+        if dep not in self.digests:
+            self.digests[dep] = self.compute(dep)
+        return self.digests[dep]
+
+    def compute(self, dep):
+        kind, _, target = dep.partition(":")
+        if kind == "source":
+            info = self.index.get(target)
+            return info.hash if info is not None else None
+        if kind in ("template", "partial"):
+            return hash_file(target) if os.path.exists(target) else None
+        if kind == "option" and target == "basepath":
+            return self.basepath
+        if kind == "image":
+            attrs = self.image_attrs.get(target) if self.image_attrs is not None else None
+            return hash_bytes(json.dumps(attrs, sort_keys=True).encode())
+        return None
+
+    def page_deps(self, source, links, includes=()):
+        deps = [dependency("source", source), dependency("template", self.template_path), dependency("option", "basepath")]
+        deps.extend(dependency("image", target) for kind, target in links if kind == "image")
+        deps.extend(dependency("partial", path) for path in includes)
+        return {dep: self.digest(dep) for dep in deps}
+
+    def changed(self, deps):
+        return [describe(dep, self.digest(dep)) for dep, digest in deps.items() if self.digest(dep) != digest]
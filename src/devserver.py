@@ -0,0 +1,266 @@
+import functools
+import os
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from dependencies import DependencyResolver
+from page_generator import build_pages, collect_pages, generate_pages_recursive, page_dest_path
+from page_index import PageIndex
+from feeds import FEED_ENTRIES, generate_feeds
+from file_watch import open_watcher
+from images import IMAGE_EXTENSIONS
+from listings import generate_listings, section_posts
+from postprocess import PostProcessor, postprocess_site, static_transforms
+from render_context import RenderContext
+from static_sync import sync_file
+
+
+LIVERELOAD_PATH = "/__livereload"
+LIVERELOAD_SCRIPT = (
+    "<script>new EventSource(\"" + LIVERELOAD_PATH + "\")"
+    ".onmessage = function () { location.reload(); };</script>"
+)
+
+
+class ReloadNotifier():
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.generation = 0
+
+    def notify(self):
+        with self.condition:
+            self.generation += 1
+            self.condition.notify_all()
+
+    def wait(self, generation, timeout=15):
+        with self.condition:
+            self.condition.wait_for(lambda: self.generation != generation, timeout)
+            return self.generation
+
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    notifier = None
+
+    def do_GET(self):
+        if self.path == LIVERELOAD_PATH:
+            self.stream_reloads()
+            return
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            path = os.path.join(path, "index.html")
+        if path.endswith(".html") and os.path.isfile(path):
+            self.send_html(path)
+            return
+        super().do_GET()
+
+    def send_html(self, path):
+        with open(path, "rb") as file:
+            body = file.read()
+        script = LIVERELOAD_SCRIPT.encode()
+        if b"</body>" in body:
+            body = body.replace(b"</body>", script + b"</body>", 1)
+        else:
+            body += script
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_reloads(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        generation = self.notifier.generation
+        try:
+            while True:
+                current = self.notifier.wait(generation)
+                if current == generation:
+                    self.wfile.write(b": keepalive\n\n")
+                else:
+                    self.wfile.write(b"data: reload\n\n")
+                    generation = current
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(dest_dir, port, notifier):
+    handler = type("Handler", (LiveReloadHandler,), {"notifier": notifier})
+    server = ThreadingHTTPServer(("", port), functools.partial(handler, directory=dest_dir))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    print(f"Serving {dest_dir} on http://localhost:{port}/")
+    return server
+
+
+def listing_fields(info):
+    return None if info is None else (info.title, info.date, info.tags, info.draft)
+
+
+class SiteWatcher():
+    def __init__(self, basepath, manifest, content_dir="content", static_dir="static",
+                 template_path="template.html", dest_dir="docs", context=None, image_pipeline=None, index=None,
+                 drafts=False, listing_options=None, static_mode="copy", minify=False, precompress=False, search=None,
+                 site_url=None, feed_section="blog"):
+        self.basepath = basepath
+        self.manifest = manifest
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.dest_dir = dest_dir
+        if context is None:
+            context = RenderContext(image_attrs=image_pipeline.attrs if image_pipeline is not None else None,
+                                    search_dir=search.search_dir if search is not None else None)
+        self.context = context
+        self.image_pipeline = image_pipeline
+        if index is None:
+            index = PageIndex.build(collect_pages(content_dir, dest_dir), dest_dir)
+        self.index = index
+        self.drafts = drafts
+        self.listing_options = listing_options
+        self.static_mode = static_mode
+        self.minify = minify
+        self.precompress = precompress
+        self.search = search
+        self.site_url = site_url
+        self.feed_section = feed_section
+        self.feed_sources = self.feed_posts() if site_url else set()
+        self.source = open_watcher([content_dir, static_dir, template_path, context.partials_dir])
+
+    def feed_posts(self):
+        return set(post.source for post in section_posts(self.index, self.feed_section, self.drafts)[:FEED_ENTRIES])
+
+    def poll(self):
+        changed, deleted = self.source.changes()
+        if not changed and not deleted:
+            return False
+        self.rebuild(changed, deleted)
+        return True
+
+    def rebuild(self, changed, deleted):
+        started = time.perf_counter()
+        deleted = list(deleted)
+        images_changed = self.image_pipeline is not None and any(
+            path.startswith(self.static_dir + os.sep) and path.lower().endswith(IMAGE_EXTENSIONS)
+            for path in changed + deleted
+        )
+        partials_changed = any(path.startswith(self.context.partials_dir + os.sep) for path in changed + deleted)
+        full = self.template_path in changed or images_changed or partials_changed
+        if full:
+            if images_changed:
+                self.context.image_attrs = self.image_pipeline.run(self.manifest)
+            self.index = PageIndex.build(collect_pages(self.content_dir, self.dest_dir), self.dest_dir)
+            try:
+                generate_pages_recursive(self.content_dir, self.template_path, self.dest_dir, self.basepath,
+                                         self.manifest, context=self.context, index=self.index, drafts=self.drafts)
+            except Exception as e:
+                # The pages that did build are already in the manifest; the broken ones are retried when edited.
+                print(e)
+            changed = [path for path in changed if not path.endswith(".md")]
+
+        # Past a full rebuild, each later stage only redoes what this rebuild touched: listings and the feed when
+        # a page's title, date, tags or draft flag changed, the sitemap when a URL or a date changed, and
+        # post-processing for the files written or removed here.
+        relisted = remapped = full
+        rendered, written, removed = [], [], []
+        pages = []
+        for path in changed:
+            if path.startswith(self.static_dir + os.sep):
+                dest_path = os.path.join(self.dest_dir, os.path.relpath(path, self.static_dir))
+                sync_file(path, dest_path, self.manifest, self.static_mode, static_transforms(self.minify))
+                written.append(dest_path)
+            elif path.endswith(".md"):
+                dest_path = page_dest_path(path, self.content_dir, self.dest_dir)
+                previous = self.index.get(path)
+                info = self.index.update(path, dest_path)
+                if listing_fields(info) != listing_fields(previous):
+                    relisted = True
+                    # The sitemap gives each page's date as its lastmod.
+                    remapped = remapped or getattr(info, "date", None) != getattr(previous, "date", None)
+                if info is None:
+                    print(f"Failed to generate page from {path}:\n{self.index.errors[path]}")
+                elif info.draft and not self.drafts:
+                    deleted.append(path)
+                else:
+                    pages.append((path, dest_path))
+        built, _ = build_pages(pages, self.template_path, self.basepath, context=self.context, index=self.index)
+        resolver = DependencyResolver(self.index, self.template_path, self.basepath, self.context.image_attrs)
+        for from_path, page in built.items():
+            info = self.index.get(from_path)
+            remapped = remapped or from_path not in self.manifest.pages
+            self.manifest.record(from_path, info.hash, info.output,
+                                 resolver.page_deps(from_path, page["links"], page["includes"]), page["links"])
+            rendered.append(info.output)
+
+        for path in deleted:
+            if path.endswith(".md") and not os.path.exists(path) and self.index.remove(path) is not None:
+                relisted = True
+            if path.startswith(self.static_dir + os.sep):
+                dest_path = os.path.join(self.dest_dir, os.path.relpath(path, self.static_dir))
+                if dest_path in self.manifest.static:
+                    self.manifest.static.remove(dest_path)
+                self.manifest.transformed.pop(dest_path, None)
+            elif path.endswith(".md") and path in self.manifest.pages:
+                dest_path = self.manifest.pages.pop(path)["output"]
+                remapped = True
+            else:
+                continue
+            removed.append(dest_path)
+            if os.path.exists(dest_path):
+                os.remove(dest_path)
+                print(f"Removing {dest_path}")
+        if self.listing_options is not None and relisted:
+            listed = set(self.manifest.listings)
+            listings, _ = generate_listings(self.index, self.template_path, self.dest_dir, self.basepath,
+                                            self.manifest, drafts=self.drafts, **self.listing_options)
+            for path in listings:
+                print(f"Generating listing {path}")
+            rendered.extend(listings)
+            removed.extend(listed - set(self.manifest.listings))
+            remapped = remapped or listed != set(self.manifest.listings)
+        if self.search is not None:
+            indexed, unindexed = self.search.update(self.manifest, self.index, self.basepath)
+            print(f"Search index: {len(indexed)} page(s) indexed, {len(unindexed)} removed")
+        if self.site_url:
+            # The feed carries its posts' content, so editing one of them rewrites it too. A site first built
+            # without a site URL has neither file yet.
+            refeed = relisted or not self.manifest.feeds or any(source in self.feed_sources for source in built)
+            remapped = remapped or not self.manifest.feeds
+            if remapped or refeed:
+                feeds = set(self.manifest.feeds)
+                generate_feeds(self.manifest, self.index, self.template_path, self.dest_dir, self.basepath,
+                               self.site_url, self.feed_section, self.drafts, sitemap=remapped, feed=refeed)
+                written.extend(self.manifest.feeds)
+                removed.extend(feeds - set(self.manifest.feeds))
+            if refeed:
+                self.feed_sources = self.feed_posts()
+        if self.minify or self.precompress:
+            extras = self.search.outputs() if self.search is not None else []
+            if full:
+                postprocess_site(self.manifest, self.minify, self.precompress, extras)
+            else:
+                processor = PostProcessor(self.manifest, self.minify, self.precompress)
+                processor.forget(removed)
+                processor.run(rendered + written + extras, rendered, prune=False)
+        print(f"Rebuilt in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+
+def watch(watcher, interval=0.05, notifier=None):
+    print("Watching for changes, press Ctrl+C to stop")
+    try:
+        while True:
+            if watcher.poll() and notifier is not None:
+                notifier.notify()
+            watcher.source.wait(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.source.close()
+        watcher.manifest.save()
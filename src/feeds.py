@@ -0,0 +1,197 @@
+import os
+from xml.sax.saxutils import escape, quoteattr
+from converters import markdown_to_html
+from listings import section_posts
+from page_generator import write_output
+from page_index import page_url, split_front_matter
+from template import load_template, rewrite_urls
+
+
+SITEMAP_MAX_URLS = 50000
+FEED_ENTRIES = 20
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+ATOM_NS = "http://www.w3.org/2005/Atom"
+
+
+class XmlWriter():
+    def __init__(self, fp):
+        self.fp = fp
+        self.stack = []
+
+    def declaration(self):
+        self.fp.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+
+    def open_tag(self, tag, attrs):
+        if not attrs:
+            return f"<{tag}"
+        return f"<{tag}" + "".join(f" {name}={quoteattr(value)}" for name, value in attrs.items())
+
+    def start(self, tag, attrs=None):
+        self.fp.write(self.open_tag(tag, attrs) + ">")
+        self.stack.append(tag)
+
+    def end(self):
+        self.fp.write(f"</{self.stack.pop()}>\n")
+
+    def element(self, tag, text=None, attrs=None):
+        if text is None:
+            self.fp.write(self.open_tag(tag, attrs) + "/>")
+        else:
+            self.fp.write(f"{self.open_tag(tag, attrs)}>{escape(text)}</{tag}>")
+
+
+def absolute_url(site_url, basepath, url):
+    return site_url.rstrip("/") + basepath.rstrip("/") + url
+
+
+def extract_content(html, template):
+    # Slices the Content slot back out of a rendered page by matching the template's static segments
+    # around it, so the feed does not re-render markdown the build already turned into HTML.
+    if "Content" not in template.slots:
+        return None
+    slot = template.slots.index("Content")
+    start = 0
+    for segment in template.segments[:slot + 1]:
+        found = html.find(segment, start)
+        if found < 0:
+            return None
+        start = found + len(segment)
+    end = len(html)
+    for segment in reversed(template.segments[slot + 1:]):
+        found = html.rfind(segment, start, end)
+        if found < 0:
+            return None
+        end = found
+    return html[start:end]
+
+
+def page_content(info, template, basepath):
+    try:
+        with open(info.output) as file:
+            content = extract_content(file.read(), template)
+    except OSError:
+        content = None
+    if content is None:
+        with open(info.source) as file:
+            _, markdown = split_front_matter(file.read())
+        content = rewrite_urls(markdown_to_html(markdown), basepath)
+    return content
+
+
+def write_sitemap_file(path, urls):
+    def write(fp):
+        writer = XmlWriter(fp)
+        writer.declaration()
+        writer.start("urlset", {"xmlns": SITEMAP_NS})
+        fp.write("\n")
+        for loc, lastmod in urls:
+            writer.start("url")
+            writer.element("loc", loc)
+            if lastmod:
+                writer.element("lastmod", lastmod)
+            writer.end()
+        writer.end()
+    write_output(path, write)
+
+
+def write_sitemaps(urls, dest_dir, sitemap_url, max_urls=SITEMAP_MAX_URLS):
+    # URLs are consumed in max_urls slices, so even a huge site never holds more than one file's worth.
+    urls = iter(urls)
+    outputs = []
+    while True:
+        batch = []
+        for url in urls:
+            batch.append(url)
+            if len(batch) == max_urls:
+                break
+        if not batch and outputs:
+            break
+        outputs.append(os.path.join(dest_dir, f"sitemap-{len(outputs) + 1}.xml"))
+        write_sitemap_file(outputs[-1], batch)
+        if len(batch) < max_urls:
+            break
+
+    sitemap_path = os.path.join(dest_dir, "sitemap.xml")
+    if len(outputs) == 1:
+        os.replace(outputs[0], sitemap_path)
+        return [sitemap_path]
+
+    def write(fp):
+        writer = XmlWriter(fp)
+        writer.declaration()
+        writer.start("sitemapindex", {"xmlns": SITEMAP_NS})
+        fp.write("\n")
+        for path in outputs:
+            writer.start("sitemap")
+            writer.element("loc", sitemap_url + os.path.basename(path))
+            writer.end()
+        writer.end()
+    write_output(sitemap_path, write)
+    return [sitemap_path] + outputs
+
+
+def iter_sitemap_urls(manifest, index, dest_dir, site_url, basepath):
+    dates = {info.output: info.date for info in index.pages.values()}
+    outputs = sorted(set(entry["output"] for entry in manifest.pages.values()) | set(manifest.listings))
+    for output in outputs:
+        yield absolute_url(site_url, basepath, page_url(output, dest_dir)), dates.get(output)
+
+
+def atom_date(date):
+    return f"{date[:10]}T00:00:00Z" if date else "1970-01-01T00:00:00Z"
+
+
+def write_feed(path, posts, template, site_url, basepath, title):
+    feed_url = absolute_url(site_url, basepath, "/" + os.path.basename(path))
+    home_url = absolute_url(site_url, basepath, "/")
+
+    def write(fp):
+        writer = XmlWriter(fp)
+        writer.declaration()
+        writer.start("feed", {"xmlns": ATOM_NS})
+        fp.write("\n")
+        writer.element("title", title)
+        writer.element("id", home_url)
+        writer.element("link", attrs={"href": home_url})
+        writer.element("link", attrs={"href": feed_url, "rel": "self"})
+        writer.element("updated", atom_date(max((post.date or "" for post in posts), default="")))
+        fp.write("\n")
+        for post in posts:
+            url = absolute_url(site_url, basepath, post.url)
+            writer.start("entry")
+            writer.element("title", post.title or post.url)
+            writer.element("id", url)
+            writer.element("link", attrs={"href": url})
+            writer.element("updated", atom_date(post.date))
+            for tag in post.tags:
+                writer.element("category", attrs={"term": tag})
+            writer.element("content", page_content(post, template, basepath), {"type": "html", "xml:base": home_url})
+            writer.end()
+        writer.end()
+    write_output(path, write)
+
+
+def generate_feeds(manifest, index, template_path, dest_dir, basepath, site_url, section="blog", drafts=False,
+                   max_urls=SITEMAP_MAX_URLS, entries=FEED_ENTRIES, sitemap=True, feed=True):
+    # The dev server skips whichever part a rebuild did not affect and keeps the files already written for it.
+    feed_path = os.path.join(dest_dir, "feed.xml")
+    if sitemap:
+        outputs = write_sitemaps(iter_sitemap_urls(manifest, index, dest_dir, site_url, basepath), dest_dir,
+                                 absolute_url(site_url, basepath, "/"), max_urls)
+    else:
+        outputs = [output for output in manifest.feeds if output != feed_path]
+    if feed:
+        template = load_template(template_path, basepath)
+        posts = section_posts(index, section, drafts)[:entries]
+        write_feed(feed_path, posts, template, site_url, basepath, section.strip("/").capitalize())
+    outputs.append(feed_path)
+
+    remove_feeds(manifest, outputs)
+    return outputs
+
+
+def remove_feeds(manifest, keep=()):
+    for output in sorted(set(manifest.feeds) - set(keep)):
+        if os.path.exists(output):
+            os.remove(output)
+    manifest.feeds = list(keep)
@@ -0,0 +1,205 @@
+import ctypes
+import errno
+import os
+import select
+import struct
+import time
+from stat import S_ISDIR
+
+
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+# Files are picked up once they are closed after writing rather than on every write or on creation, so a
+# rebuild never reads a half-written source.
+WATCH_MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+EVENT = struct.Struct("iIII")
+
+
+def load_libc():
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+        libc.inotify_rm_watch
+    except (AttributeError, OSError, TypeError):
+        return None
+    return libc
+
+
+_libc = load_libc()
+
+
+def libc_error(path=None):
+    error = ctypes.get_errno()
+    return OSError(error, os.strerror(error), path)
+
+
+def snapshot(paths, visit=None):
+    files = {}
+    pending = list(paths)
+    while pending:
+        path = pending.pop()
+        try:
+            if os.path.isdir(path):
+                if visit is not None:
+                    visit(path)
+                for entry in os.scandir(path):
+                    if entry.is_dir():
+                        pending.append(entry.path)
+                    else:
+                        stat = entry.stat()
+                        files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+            else:
+                stat = os.stat(path)
+                files[path] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            continue
+    return files
+
+
+def diff_snapshots(old, new):
+    changed = sorted(path for path, signature in new.items() if old.get(path) != signature)
+    deleted = sorted(path for path in old if path not in new)
+    return changed, deleted
+
+
+class SnapshotWatcher():
+    # Portable fallback: stats every file under the watched paths on each poll.
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self.files = snapshot(self.paths)
+
+    def changes(self):
+        files = snapshot(self.paths)
+        changed, deleted = diff_snapshots(self.files, files)
+        self.files = files
+        return changed, deleted
+
+    def wait(self, interval):
+        time.sleep(interval)
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher():
+    # Keeps the same {path: (mtime_ns, size)} map as SnapshotWatcher but only stats the paths the kernel
+    # reports events for, so an idle poll is one non-blocking read instead of a stat per file. The parent of
+    # each root is watched as well, so a root that is created, removed or replaced by a rename is noticed.
+    def __init__(self, paths):
+        self.fd = _libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise libc_error()
+        self.roots = list(paths)
+        self.dirs = {}
+        try:
+            self.files = self.scan()
+        except OSError:
+            self.close()
+            raise
+
+    def add_watch(self, directory):
+        wd = _libc.inotify_add_watch(self.fd, os.fsencode(directory or os.curdir), WATCH_MASK)
+        if wd >= 0:
+            self.dirs[wd] = directory
+            return
+        error = libc_error(directory)
+        if error.errno not in (errno.ENOENT, errno.ENOTDIR):
+            raise error
+
+    def forget(self, directory):
+        for wd, path in list(self.dirs.items()):
+            if path == directory or path.startswith(directory + os.sep):
+                _libc.inotify_rm_watch(self.fd, wd)
+                del self.dirs[wd]
+
+    def scan(self):
+        for root in self.roots:
+            self.add_watch(os.path.dirname(root))
+        return snapshot(self.roots, self.add_watch)
+
+    def is_watched(self, path):
+        return any(path == root or path.startswith(root + os.sep) for root in self.roots)
+
+    def event_paths(self, path, mask):
+        if not self.is_watched(path):
+            return ()
+        if not mask & IN_ISDIR:
+            return () if mask & IN_CREATE else (path,)
+        if mask & (IN_CREATE | IN_MOVED_TO):
+            # Files written before the new directory's watch was added have no events of their own.
+            return snapshot([path], self.add_watch)
+        if mask & (IN_DELETE | IN_MOVED_FROM):
+            self.forget(path)
+            return [known for known in self.files if known.startswith(path + os.sep)]
+        return ()
+
+    def read_events(self):
+        paths = set()
+        overflowed = False
+        while True:
+            try:
+                data = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                return paths, overflowed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT.unpack_from(data, offset)
+                name = os.fsdecode(data[offset + EVENT.size:offset + EVENT.size + length].rstrip(b"\0"))
+                offset += EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    overflowed = True
+                elif mask & IN_IGNORED:
+                    self.dirs.pop(wd, None)
+                elif wd in self.dirs:
+                    paths.update(self.event_paths(os.path.join(self.dirs[wd], name), mask))
+
+    def changes(self):
+        paths, overflowed = self.read_events()
+        if overflowed:
+            # The kernel dropped events, so fall back to one full scan.
+            files = self.scan()
+            changed, deleted = diff_snapshots(self.files, files)
+            self.files = files
+            return changed, deleted
+        changed = []
+        deleted = []
+        for path in sorted(paths):
+            try:
+                stat = os.stat(path)
+            except (FileNotFoundError, NotADirectoryError):
+                if self.files.pop(path, None) is not None:
+                    deleted.append(path)
+                continue
+            if S_ISDIR(stat.st_mode):
+                continue
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if self.files.get(path) != signature:
+                self.files[path] = signature
+                changed.append(path)
+        return changed, deleted
+
+    def wait(self, interval):
+        # Blocks until something happens, then lets the rest of a burst of saves arrive before rebuilding.
+        select.select([self.fd], [], [])
+        time.sleep(interval)
+
+    def close(self):
+        os.close(self.fd)
+
+
+def open_watcher(paths):
+    if _libc is not None:
+        try:
+            return InotifyWatcher(paths)
+        except OSError as error:
+            print(f"Watching with inotify failed ({error}), polling instead")
+    return SnapshotWatcher(paths)
@@ -0,0 +1,127 @@
+import os
+import re
+from html import escape
+from render_context import get_render_context
+
+
+HIGHLIGHT_CACHE_PATH = os.path.join(".cache", "highlight.json")
+HIGHLIGHT_CACHE_SIZE = 4096
+
+STRING = r'"(?:\\.|[^"\\\n])*"|' + r"'(?:\\.|[^'\\\n])*'"
+NUMBER = r"\b(?:0[xX][0-9a-fA-F]+|\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)\b"
+
+
+def words(*names):
+    return r"\b(?:" + "|".join(names) + r")\b"
+
+
+LANGUAGE_RULES = {
+    "python": [
+        ("comment", r"#[^\n]*"),
+        ("string", r"[rRbBuUfF]{0,2}(?:\"\"\"[\s\S]*?\"\"\"|'''[\s\S]*?'''|" + STRING + ")"),
+        ("decorator", r"@[\w.]+"),
+        ("keyword", words(
+            "and", "as", "assert", "async", "await", "break", "class", "continue", "def", "del", "elif", "else",
+            "except", "finally", "for", "from", "global", "if", "import", "in", "is", "lambda", "nonlocal", "not",
+            "or", "pass", "raise", "return", "try", "while", "with", "yield", "None", "True", "False",
+        )),
+        ("builtin", words(
+            "print", "len", "range", "open", "int", "str", "float", "list", "dict", "set", "tuple", "bool",
+            "isinstance", "enumerate", "zip", "map", "filter", "sorted", "super", "self",
+        )),
+        ("number", NUMBER),
+    ],
+    "javascript": [
+        ("comment", r"//[^\n]*|/\*[\s\S]*?\*/"),
+        ("string", STRING + r"|`(?:\\.|[^`\\])*`"),
+        ("keyword", words(
+            "async", "await", "break", "case", "catch", "class", "const", "continue", "default", "delete", "do",
+            "else", "export", "extends", "finally", "for", "function", "if", "import", "in", "instanceof", "let",
+            "new", "of", "return", "switch", "this", "throw", "try", "typeof", "var", "void", "while", "yield",
+            "true", "false", "null", "undefined",
+        )),
+        ("number", NUMBER),
+    ],
+    "bash": [
+        ("comment", r"(?<![\w$])#[^\n]*"),
+        ("string", STRING),
+        ("variable", r"\$\{[^}\n]*\}|\$\w+|\$[#?@*$!]"),
+        ("keyword", words(
+            "if", "then", "else", "elif", "fi", "for", "while", "until", "do", "done", "case", "esac", "in",
+            "function", "return", "export", "local", "set", "unset",
+        )),
+        ("number", NUMBER),
+    ],
+    "json": [
+        ("property", r'"(?:\\.|[^"\\\n])*"(?=\s*:)'),
+        ("string", r'"(?:\\.|[^"\\\n])*"'),
+        ("keyword", words("true", "false", "null")),
+        ("number", r"-?" + NUMBER),
+    ],
+    "css": [
+        ("comment", r"/\*[\s\S]*?\*/"),
+        ("string", STRING),
+        ("property", r"[\w-]+(?=\s*:[^{;]*[;}\n])"),
+        ("number", r"#[0-9a-fA-F]{3,8}\b|-?\b\d+(?:\.\d+)?(?:%|[a-z]+)?"),
+    ],
+}
+LANGUAGE_RE = re.compile(r"[\w+#-]+")
+LANGUAGE_ALIASES = {
+    "py": "python",
+    "python3": "python",
+    "js": "javascript",
+    "mjs": "javascript",
+    "sh": "bash",
+    "shell": "bash",
+    "zsh": "bash",
+    "console": "bash",
+}
+
+_lexers = {}
+
+
+def parse_info(info):
+    if not info:
+        return None
+    language = info.split()[0].lower().lstrip(".{").rstrip("}")
+    if LANGUAGE_RE.fullmatch(language) is None:
+        return None
+    return LANGUAGE_ALIASES.get(language, language)
+
+
+def get_lexer(language):
+    # Each process compiles a language's rule table into one alternation the first time it is used.
+    # Racing threads at worst compile the same pattern twice, so no lock is needed.
+    lexer = _lexers.get(language)
+    if lexer is None and language in LANGUAGE_RULES:
+        lexer = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in LANGUAGE_RULES[language]))
+        _lexers[language] = lexer
+    return lexer
+
+
+def highlight(code, language):
+    lexer = get_lexer(language)
+    if lexer is None:
+        return None
+    parts = []
+    pos = 0
+    for match in lexer.finditer(code):
+        if match.start() > pos:
+            parts.append(escape(code[pos:match.start()], quote=False))
+        parts.append(f'<span class="tok-{match.lastgroup}">{escape(match.group(), quote=False)}</span>')
+        pos = match.end()
+    parts.append(escape(code[pos:], quote=False))
+    return "".join(parts)
+
+
+def highlight_code(code, language):
+    cache = get_render_context().highlight_cache
+    if cache is None or language not in LANGUAGE_RULES:
+        return highlight(code, language)
+    # Entries are one-element tuples, matching the shape BlockCache restores from disk.
+    key = f"{language}\n{code}"
+    entry = cache.get(key)
+    if entry is None:
+        entry = (highlight(code, language),)
+        cache.put(key, entry)
+    return entry[0]
@@ -1,22 +1,28 @@
+import sys
+
+
 class HTMLNode():
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
-        self.tag = tag
+        self.tag = sys.intern(tag) if tag is not None else None
         self.value = value
         self.children = children
         self.props = props
 
-    def to_html(self):
+    def iter_html(self):
         raise NotImplementedError
 
-    def props_to_html(self):
-        output = ""
-        if self.props is None:
-            return output
+    def to_html(self):
+        return "".join(self.iter_html())
 
-        for key, value in self.props.items():
-            output = output + f' {key}="{value}"'
+    def write_html(self, fp):
+        fp.writelines(self.iter_html())
 
-        return output
+    def props_to_html(self):
+        if self.props is None:
+            return ""
+        return "".join([f' {key}="{value}"' for key, value in self.props.items()])
 
     def __repr__(self):
         return f"HTMLNode(tag: {self.tag}, value: {self.value}, children: {self.children}, props: {self.props})"
@@ -0,0 +1,188 @@
+import json
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from manifest import hash_bytes, hash_file
+from static_sync import copy_file, needs_copy
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+IMAGE_CACHE_DIR = os.path.join(".cache", "images")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+DEFAULT_WIDTHS = (480, 960)
+
+
+def image_size(path):
+    with open(path, "rb") as file:
+        head = file.read(32)
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10])
+        if head.startswith(b"RIFF") and head[8:12] == b"WEBP" and head[12:16] == b"VP8X":
+            width = int.from_bytes(head[24:27], "little") + 1
+            height = int.from_bytes(head[27:30], "little") + 1
+            return width, height
+        if head.startswith(b"\xff\xd8"):
+            file.seek(2)
+            while True:
+                marker = file.read(4)
+                if len(marker) < 4 or marker[0] != 0xFF:
+                    return None
+                length = struct.unpack(">H", marker[2:4])[0]
+                if marker[1] in (0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF):
+                    height, width = struct.unpack(">HH", file.read(5)[1:5])
+                    return width, height
+                file.seek(length - 2, os.SEEK_CUR)
+    return None
+
+
+def variant_name(rel_path, width):
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}-{width}w{ext}"
+
+
+def remove_derived(manifest, keep=()):
+    removed = []
+    for dest_path in sorted(set(manifest.derived) - set(keep)):
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+            removed.append(dest_path)
+    manifest.derived = list(keep)
+    return removed
+
+
+def process_image(src_path, cache_dir, widths):
+    # Runs in a worker process; everything it produces lands in cache_dir so it is never redone.
+    os.makedirs(cache_dir, exist_ok=True)
+    size = image_size(src_path)
+    variants = []
+    if size is not None and Image is not None:
+        ext = os.path.splitext(src_path)[1]
+        with Image.open(src_path) as image:
+            for width in widths:
+                if width >= size[0]:
+                    continue
+                height = round(size[1] * width / size[0])
+                resized = image.resize((width, height), Image.LANCZOS)
+                resized.save(os.path.join(cache_dir, f"{width}{ext}"), optimize=True)
+                variants.append(width)
+    meta = {"size": size, "variants": variants}
+    tmp_path = os.path.join(cache_dir, "meta.json.tmp")
+    with open(tmp_path, "w") as file:
+        json.dump(meta, file)
+    os.replace(tmp_path, os.path.join(cache_dir, "meta.json"))
+    return meta
+
+
+class ImagePipeline():
+    def __init__(self, static_dir="static", dest_dir="docs", basepath="/", cache_dir=IMAGE_CACHE_DIR,
+                 widths=DEFAULT_WIDTHS, workers=None):
+        self.static_dir = static_dir
+        self.dest_dir = dest_dir
+        self.basepath = basepath
+        self.cache_dir = cache_dir
+        self.widths = tuple(sorted(widths))
+        self.workers = workers
+        self.attrs = {}
+        self.outputs = []
+
+    def collect(self):
+        images = []
+        for root, dirs, names in os.walk(self.static_dir):
+            dirs.sort()
+            for name in sorted(names):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    path = os.path.join(root, name)
+                    images.append((path, os.path.relpath(path, self.static_dir)))
+        return images
+
+    def cache_path(self, content_hash):
+        widths = ",".join(str(width) for width in self.widths)
+        return os.path.join(self.cache_dir, hash_bytes(f"{content_hash}:{widths}".encode())[:32])
+
+    def load_hashes(self):
+        try:
+            with open(os.path.join(self.cache_dir, "hashes.json")) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def save_hashes(self, hashes):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = os.path.join(self.cache_dir, "hashes.json.tmp")
+        with open(tmp_path, "w") as file:
+            json.dump(hashes, file)
+        os.replace(tmp_path, os.path.join(self.cache_dir, "hashes.json"))
+
+    def content_hashes(self, images):
+        # Hashing a multi-GB image tree on every build is wasteful, so hashes are reused while size and mtime match.
+        known = self.load_hashes()
+        hashes = {}
+        for path, _ in images:
+            stat = os.stat(path)
+            entry = known.get(path)
+            if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+                hashes[path] = entry
+            else:
+                hashes[path] = [stat.st_size, stat.st_mtime_ns, hash_file(path)]
+        if hashes != known:
+            self.save_hashes(hashes)
+        return [hashes[path][2] for path, _ in images]
+
+    def load_meta(self, cache_dir):
+        try:
+            with open(os.path.join(cache_dir, "meta.json")) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def run(self, manifest=None):
+        images = self.collect()
+        self.attrs = {}
+        self.outputs = []
+        cache_dirs = [self.cache_path(content_hash) for content_hash in self.content_hashes(images)]
+        metas = [self.load_meta(cache_dir) for cache_dir in cache_dirs]
+        pending = [i for i, meta in enumerate(metas) if meta is None]
+        if pending:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                results = executor.map(
+                    process_image,
+                    [images[i][0] for i in pending],
+                    [cache_dirs[i] for i in pending],
+                    [self.widths] * len(pending),
+                )
+                for i, meta in zip(pending, results):
+                    metas[i] = meta
+
+        for (src_path, rel_path), cache_dir, meta in zip(images, cache_dirs, metas):
+            url = "/" + rel_path.replace(os.sep, "/")
+            attrs = {}
+            if meta["size"] is not None:
+                width, height = meta["size"]
+                attrs["width"] = str(width)
+                attrs["height"] = str(height)
+            if meta["variants"]:
+                ext = os.path.splitext(rel_path)[1]
+                srcset = []
+                for width in meta["variants"]:
+                    variant = variant_name(rel_path, width)
+                    dest_path = os.path.join(self.dest_dir, variant)
+                    src_variant = os.path.join(cache_dir, f"{width}{ext}")
+                    if needs_copy(src_variant, dest_path):
+                        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                        copy_file(src_variant, dest_path)
+                    self.outputs.append(dest_path)
+                    srcset.append(f"{self.basepath}{variant.replace(os.sep, '/')} {width}w")
+                srcset.append(f"{self.basepath}{rel_path.replace(os.sep, '/')} {meta['size'][0]}w")
+                attrs["srcset"] = ", ".join(srcset)
+            attrs["loading"] = "lazy"
+            self.attrs[url] = attrs
+
+        if manifest is not None:
+            remove_derived(manifest, self.outputs)
+        return self.attrs
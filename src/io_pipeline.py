@@ -0,0 +1,101 @@
+import os
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+IO_THREADS = 4
+IO_WINDOW = 32
+
+
+def read_source(path, max_bytes=None):
+    # Files too large to hold in memory come back as None so the caller streams them instead.
+    if max_bytes is not None and os.path.getsize(path) > max_bytes:
+        return None
+    with open(path) as file:
+        return file.read()
+
+
+def create_dirs(paths):
+    # Output directories are created once from the job list instead of being checked before every write.
+    created = []
+    for directory in sorted(set(os.path.dirname(path) for path in paths)):
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+            created.append(directory)
+    return created
+
+
+class IOPipeline():
+    # Source reads run up to `window` files ahead of rendering and output writes trail behind it on a small
+    # thread pool, so storage latency overlaps with parsing and rendering instead of adding to it.
+    def __init__(self, threads=IO_THREADS, window=IO_WINDOW, max_bytes=None):
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+        self.window = window
+        self.max_bytes = max_bytes
+        self.queued = deque()
+        self.reads = {}
+        self.writes = deque()
+        self.pending = {}
+        self.settled = []
+        self.failures = {}
+
+    def prefetch(self, paths):
+        self.queued.extend(paths)
+        self.fill()
+
+    def fill(self):
+        while self.queued and len(self.reads) < self.window:
+            path = self.queued.popleft()
+            self.reads[path] = self.executor.submit(read_source, path, self.max_bytes)
+
+    def read(self, path):
+        future = self.reads.pop(path, None)
+        self.fill()
+        if future is None:
+            return read_source(path, self.max_bytes)
+        return future.result()
+
+    def discard(self, path):
+        # A page that fails before reading its source hands back its prefetched read and its window slot.
+        future = self.reads.pop(path, None)
+        if future is not None:
+            future.cancel()
+            self.fill()
+
+    def write(self, key, write, *args):
+        self.pending[key] = self.pending.get(key, 0) + 1
+        while len(self.writes) >= self.window:
+            self.settle(*self.writes.popleft())
+        self.writes.append((key, self.executor.submit(write, *args)))
+
+    def is_pending(self, key):
+        return key in self.pending
+
+    def settle(self, key, future):
+        wait([future])
+        error = future.exception()
+        if error is not None and key not in self.failures:
+            self.failures[key] = "".join(traceback.format_exception(error))
+        self.pending[key] -= 1
+        if not self.pending[key]:
+            del self.pending[key]
+            self.settled.append(key)
+
+    def drain(self):
+        # Keys whose writes have all finished since the last drain, each with its first failure or None.
+        while self.writes and self.writes[0][1].done():
+            self.settle(*self.writes.popleft())
+        settled = [(key, self.failures.get(key)) for key in self.settled]
+        self.settled = []
+        return settled
+
+    def flush(self):
+        while self.writes:
+            self.settle(*self.writes.popleft())
+        return self.drain()
+
+    def close(self):
+        self.flush()
+        self.executor.shutdown(cancel_futures=True)
+        return self.failures
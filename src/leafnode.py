@@ -2,9 +2,14 @@ from htmlnode import HTMLNode
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
+    def iter_html(self):
+        yield self.to_html()
+
     def to_html(self):
         if self.value is None:
             raise ValueError
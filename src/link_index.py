@@ -0,0 +1,66 @@
+import os
+import posixpath
+import re
+
+
+EXTERNAL_RE = re.compile(r"^([a-zA-Z][a-zA-Z0-9+.-]*:|//)")
+
+
+def is_internal(target):
+    return bool(target) and not target.startswith("#") and EXTERNAL_RE.match(target) is None
+
+
+def resolve_target(page_url, target):
+    target = target.split("#", 1)[0].split("?", 1)[0]
+    if target.startswith("/"):
+        path = target
+    else:
+        path = posixpath.join(posixpath.dirname(page_url), target)
+    return posixpath.normpath(path).lstrip("/")
+
+
+def target_candidates(path):
+    if path in ("", "."):
+        return ["index.html"]
+    return [path, path + "/index.html", path + ".html"]
+
+
+def existing_files(dest_dir):
+    files = set()
+    for root, _, names in os.walk(dest_dir):
+        for name in names:
+            files.add(os.path.relpath(os.path.join(root, name), dest_dir).replace(os.sep, "/"))
+    return files
+
+
+class LinkIndex():
+    def __init__(self, dest_dir="docs"):
+        self.dest_dir = dest_dir
+        self.pages = {}
+
+    @classmethod
+    def from_manifest(cls, manifest, dest_dir="docs"):
+        index = cls(dest_dir)
+        for source, entry in manifest.pages.items():
+            index.record_page(source, entry["output"], entry.get("links", []))
+        return index
+
+    def record_page(self, source, output, links):
+        page_url = "/" + os.path.relpath(output, self.dest_dir).replace(os.sep, "/")
+        self.pages[source] = (page_url, [tuple(link) for link in links])
+
+    def targets(self):
+        return sorted(set(target for _, links in self.pages.values() for _, target in links))
+
+    def find_broken(self):
+        files = existing_files(self.dest_dir)
+        broken = []
+        for source in sorted(self.pages):
+            page_url, links = self.pages[source]
+            for kind, target in links:
+                if not is_internal(target):
+                    continue
+                path = resolve_target(page_url, target)
+                if not any(candidate in files for candidate in target_candidates(path)):
+                    broken.append((source, kind, target))
+        return broken
@@ -0,0 +1,137 @@
+import os
+import re
+from leafnode import LeafNode
+from manifest import hash_bytes
+from page_generator import write_output
+from parentnode import ParentNode
+from template import load_template, rewrite_urls
+
+
+LISTING_PER_PAGE = 10
+SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+
+def slugify(text):
+    return SLUG_RE.sub("-", text.lower()).strip("-") or hash_bytes(text.encode())[:8]
+
+
+def tag_slugs(tags):
+    # Tags that slugify alike (C++ and C#) each get a short hash of their name so their pages do not collide.
+    slugs = {tag: slugify(tag) for tag in tags}
+    counts = {}
+    for slug in slugs.values():
+        counts[slug] = counts.get(slug, 0) + 1
+    return {
+        tag: slug if counts[slug] == 1 else f"{slug}-{hash_bytes(tag.encode())[:6]}"
+        for tag, slug in slugs.items()
+    }
+
+
+def page_number_url(base_url, number):
+    return f"{base_url}page/{number}/"
+
+
+def url_output(url, dest_dir):
+    return os.path.join(dest_dir, url.strip("/"), "index.html")
+
+
+def paginate(base_url, title, posts, per_page):
+    # Archive pages are numbered from the oldest post, so a new post only changes the front page and the
+    # newest archive page instead of shifting every post down one slot across the whole listing.
+    oldest_first = posts[::-1]
+    chunks = [oldest_first[i:i + per_page] for i in range(0, len(oldest_first), per_page)]
+    listings = []
+    if len(chunks) > 1:
+        older_url = None
+        if len(posts) > per_page:
+            older_url = page_number_url(base_url, (len(posts) - 1 - per_page) // per_page + 1)
+        listings.append((base_url, title, posts[:per_page], None, older_url))
+        for i, chunk in enumerate(chunks):
+            newer_url = page_number_url(base_url, i + 2) if i + 1 < len(chunks) else base_url
+            older_url = page_number_url(base_url, i) if i > 0 else None
+            listings.append((page_number_url(base_url, i + 1), f"{title} (page {i + 1})", chunk[::-1], newer_url,
+                             older_url))
+    else:
+        listings.append((base_url, title, posts, None, None))
+    return listings
+
+
+def section_posts(index, section="blog", drafts=False):
+    section_url = f"/{section.strip('/')}/"
+    return [info for info in index.query(drafts=drafts) if info.url.startswith(section_url) and info.url != section_url]
+
+
+def plan_listings(index, section="blog", per_page=LISTING_PER_PAGE, drafts=False):
+    posts = section_posts(index, section, drafts)
+    listings = paginate(f"/{section.strip('/')}/", section.strip("/").capitalize(), posts, per_page)
+    tags = index.tags(drafts=drafts)
+    if tags:
+        slugs = tag_slugs(tags)
+        listings.append(("/tags/", "Tags", [
+            (f"/tags/{slugs[tag]}/", f"{tag} ({len(tagged)})") for tag, tagged in tags.items()
+        ], None, None))
+        for tag, tagged in tags.items():
+            listings.extend(paginate(f"/tags/{slugs[tag]}/", f"Tagged {tag}", tagged, per_page))
+    return listings
+
+
+def listing_item(post):
+    if isinstance(post, tuple):
+        url, text = post
+        return ParentNode("li", [LeafNode("a", text, {"href": url})])
+    children = [LeafNode("a", post.title, {"href": post.url})]
+    if post.date:
+        children.append(LeafNode(None, " "))
+        children.append(LeafNode("time", post.date, {"datetime": post.date}))
+    return ParentNode("li", children)
+
+
+def listing_node(title, posts, newer_url, older_url):
+    children = [LeafNode("h1", title)]
+    if posts:
+        children.append(ParentNode("ul", [listing_item(post) for post in posts]))
+    nav = []
+    if newer_url is not None:
+        nav.append(LeafNode("a", "Newer", {"href": newer_url, "rel": "prev"}))
+    if older_url is not None:
+        nav.append(LeafNode("a", "Older", {"href": older_url, "rel": "next"}))
+    if nav:
+        children.append(ParentNode("nav", nav))
+    return ParentNode("div", children)
+
+
+def generate_listings(index, template_path, dest_dir, basepath, manifest=None, section="blog",
+                      per_page=LISTING_PER_PAGE, drafts=False):
+    template = load_template(template_path, basepath)
+    claimed = set(info.output for info in index.pages.values()) if index is not None else set()
+    previous = manifest.listings if manifest is not None else {}
+    current = {}
+    written = []
+    # Without an index no listings are planned, which removes every previously generated one.
+    listings = plan_listings(index, section, per_page, drafts) if index is not None else []
+    for url, title, posts, newer_url, older_url in listings:
+        output = url_output(url, dest_dir)
+        if output in claimed:
+            continue
+        document = template.render({
+            "Title": title,
+            "Date": "",
+            "Tags": "",
+            "WordCount": "",
+            "Content": rewrite_urls(listing_node(title, posts, newer_url, older_url).to_html(), basepath),
+        })
+        digest = hash_bytes(document.encode())
+        current[output] = digest
+        if previous.get(output) == digest and os.path.exists(output):
+            continue
+        write_output(output, lambda new_file: new_file.write(document))
+        written.append(output)
+
+    removed = []
+    for output in sorted(set(previous) - set(current)):
+        if os.path.exists(output):
+            os.remove(output)
+            removed.append(output)
+    if manifest is not None:
+        manifest.listings = current
+    return written, removed
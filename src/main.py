@@ -1,38 +1,186 @@
+import argparse
 import os
 import shutil
 import sys
-from page_generator import generate_pages_recursive
-
-
-def copy_static(dir):
-    if os.path.exists(dir):
-        for item in os.listdir(dir):
-            path = os.path.join(dir, item)
-            new_dir = ""
-            if "/" in dir:
-                new_dir = os.path.join("docs", dir.split("/", 1)[1])
-            else:
-                new_dir = "docs"
-            if os.path.isfile(path):
-                if not os.path.exists(new_dir):
-                    os.mkdir(new_dir)
-                shutil.copy(path, os.path.join(new_dir, item))
-            else:
-                if not os.path.exists(new_dir):
-                    os.mkdir(new_dir)
-                copy_static(path)
-
-
-def main():
-    basepath = "/"
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
+from block_cache import BLOCK_CACHE_PATH, BlockCache
+from highlight import HIGHLIGHT_CACHE_PATH, HIGHLIGHT_CACHE_SIZE
+from devserver import ReloadNotifier, SiteWatcher, start_server, watch
+from feeds import generate_feeds, remove_feeds
+from images import DEFAULT_WIDTHS, ImagePipeline, remove_derived
+from io_pipeline import IO_THREADS
+from link_index import LinkIndex
+from listings import LISTING_PER_PAGE, generate_listings
+from manifest import BuildManifest
+from page_generator import collect_pages, generate_pages_recursive
+from page_index import PageIndex
+from postprocess import PostProcessor, postprocess_site, static_transforms
+from profiler import BuildProfiler, print_report, set_profiler
+from profiler import page as profile_page
+from render_context import RenderContext
+from search_index import SEARCH_DIR, SearchIndex
+from static_sync import LINK_MODES, sync_static
+
+
+def copy_static(src_dir, dest_dir="docs", manifest=None, checksum=False, link_mode="copy", minify=False):
+    copied, removed = sync_static(src_dir, dest_dir, manifest, checksum, link_mode,
+                                  transforms=static_transforms(minify))
+    for path in copied:
+        print(f"Copying static file to {path}")
+    for path in removed:
+        print(f"Removing stale static file {path}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static site into docs/")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument("--force", action="store_true", help="ignore the build manifest and rebuild every page")
+    parser.add_argument("--explain", action="store_true", help="print which recorded inputs made each page rebuild")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of worker processes (0 = one per CPU)")
+    parser.add_argument("--io-threads", type=int, default=IO_THREADS,
+                        help="threads per build process that prefetch sources and write outputs (0 = inline I/O)")
+    parser.add_argument("--block-cache", type=int, default=0, metavar="SIZE", help="cache up to SIZE rendered blocks in memory")
+    parser.add_argument("--persist-block-cache", action="store_true", help=f"keep the block cache in {BLOCK_CACHE_PATH} between builds")
+    parser.add_argument("--checksum", action="store_true", help="compare static files by content hash instead of mtime")
+    parser.add_argument("--static-mode", choices=LINK_MODES, default="copy", help="how static files are placed in docs/")
+    parser.add_argument("--profile", nargs="?", const="build-profile.json", metavar="PATH",
+                        help="record per-stage timings and write a JSON report (default: build-profile.json)")
+    parser.add_argument("--profile-top", type=int, default=10, metavar="N", help="number of slowest pages to report")
+    parser.add_argument("--images", action="store_true",
+                        help="generate resized image variants and emit width/height/srcset/loading attributes")
+    parser.add_argument("--image-widths", default=",".join(str(width) for width in DEFAULT_WIDTHS),
+                        help="comma separated widths of the generated image variants")
+    parser.add_argument("--drafts", action="store_true", help="also build pages marked draft: true")
+    parser.add_argument("--listings", action="store_true", help="generate paginated section and tag listing pages")
+    parser.add_argument("--listing-section", default="blog", help="content directory whose pages are listed")
+    parser.add_argument("--per-page", type=int, default=LISTING_PER_PAGE, help="entries per listing page")
+    parser.add_argument("--site-url", metavar="URL",
+                        help="absolute site URL; enables sitemap.xml and an Atom feed.xml of the listing section")
+    parser.add_argument("--search", action="store_true", help="write a sharded full-text index and client to docs/search/")
+    parser.add_argument("--minify", action="store_true", help="minify generated HTML and static CSS")
+    parser.add_argument("--precompress", action="store_true", help="write .gz (and .br when brotli is installed) siblings")
+    parser.add_argument("--check-links", action="store_true", help="report internal links and images that point nowhere")
+    parser.add_argument("--watch", action="store_true", help="rebuild affected pages when sources change")
+    parser.add_argument("--serve", action="store_true", help="watch and serve docs/ with live reload")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between source polls in watch mode, or for a burst of changes to settle with inotify")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    basepath = args.basepath
     print(basepath)
-    if os.path.exists("docs"):
-        shutil.rmtree("docs")
-    os.mkdir("docs")
-    copy_static("static")
-    generate_pages_recursive("content", "template.html", "docs", basepath)
+    manifest = BuildManifest.load()
+    if args.force:
+        manifest = BuildManifest(manifest.path)
+        if os.path.exists("docs"):
+            shutil.rmtree("docs")
+    if not os.path.exists("docs"):
+        os.mkdir("docs")
+    profiler = None
+    if args.profile:
+        profiler = BuildProfiler()
+        set_profiler(profiler)
+    with profile_page("(static)"):
+        copy_static("static", "docs", manifest, args.checksum, args.static_mode, args.minify)
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count()
+    block_cache = None
+    if args.block_cache > 0:
+        block_cache = BlockCache.load(args.block_cache, BLOCK_CACHE_PATH if args.persist_block_cache else None)
+    highlight_cache = BlockCache.load(HIGHLIGHT_CACHE_SIZE, HIGHLIGHT_CACHE_PATH)
+    image_pipeline = None
+    image_attrs = None
+    if args.images:
+        widths = [int(width) for width in args.image_widths.split(",") if width]
+        image_pipeline = ImagePipeline("static", "docs", basepath, widths=widths, workers=jobs)
+        with profile_page("(images)"):
+            image_attrs = image_pipeline.run(manifest)
+    elif manifest.derived:
+        for path in remove_derived(manifest):
+            print(f"Removing stale image variant {path}")
+    if not args.minify:
+        # Pages minified in place by an earlier --minify build have to be rendered again.
+        for source, entry in list(manifest.pages.items()):
+            record = manifest.postprocessed.get(entry["output"])
+            if record is not None and record[3][0]:
+                del manifest.pages[source]
+        for output in list(manifest.listings):
+            record = manifest.postprocessed.get(output)
+            if record is not None and record[3][0]:
+                del manifest.listings[output]
+    search = SearchIndex(SEARCH_DIR, "docs")
+    if args.search:
+        # Pages built without search have no terms, or terms for an older source, so they are rendered again.
+        for source in search.missing_terms(manifest.pages):
+            del manifest.pages[source]
+    context = RenderContext(block_cache, highlight_cache, image_attrs, SEARCH_DIR if args.search else None,
+                            io_threads=args.io_threads)
+    with profile_page("(index)"):
+        index = PageIndex.build(collect_pages("content", "docs"), "docs")
+    try:
+        generate_pages_recursive("content", "template.html", "docs", basepath, manifest, jobs, context, index,
+                                 args.drafts, args.explain)
+        if args.search:
+            with profile_page("(search)"):
+                changed, removed = search.update(manifest, index, basepath)
+            print(f"Search index: {len(changed)} page(s) indexed, {len(removed)} removed")
+        elif os.path.exists(search.output_dir):
+            search.clear()
+        if args.listings or manifest.listings:
+            with profile_page("(listings)"):
+                written, removed = generate_listings(index if args.listings else None, "template.html",
+                                                     "docs", basepath, manifest, args.listing_section, args.per_page,
+                                                     args.drafts)
+            for path in written:
+                print(f"Generating listing {path}")
+            for path in removed:
+                print(f"Removing stale listing {path}")
+        if args.site_url:
+            with profile_page("(feeds)"):
+                outputs = generate_feeds(manifest, index, "template.html", "docs", basepath, args.site_url,
+                                         args.listing_section, args.drafts)
+            print(f"Writing {', '.join(outputs)}")
+        elif manifest.feeds:
+            remove_feeds(manifest)
+        if args.minify or args.precompress:
+            with profile_page("(postprocess)"):
+                processed = postprocess_site(manifest, args.minify, args.precompress, search.outputs())
+            print(f"Post-processed {len(processed)} file(s)")
+        elif manifest.postprocessed:
+            # Drops the .gz/.br siblings left behind by an earlier --precompress build.
+            PostProcessor(manifest).run([])
+    finally:
+        manifest.save()
+        highlight_cache.save()
+        if block_cache is not None:
+            block_cache.save()
+            print(block_cache.stats())
+        if profiler is not None:
+            print_report(profiler.write_report(args.profile, args.profile_top))
+            set_profiler(None)
+
+    if args.check_links:
+        broken = LinkIndex.from_manifest(manifest, "docs").find_broken()
+        for source, kind, target in broken:
+            print(f"Broken {kind} in {source}: {target}")
+        print(f"Checked links in {len(manifest.pages)} page(s), {len(broken)} broken")
+        if broken and not (args.watch or args.serve):
+            sys.exit(1)
+
+    if args.watch or args.serve:
+        notifier = None
+        if args.serve:
+            notifier = ReloadNotifier()
+            start_server("docs", args.port, notifier)
+        listing_options = None
+        if args.listings:
+            listing_options = {"section": args.listing_section, "per_page": args.per_page}
+        watcher = SiteWatcher(basepath, manifest, context=context, image_pipeline=image_pipeline, index=index,
+                              drafts=args.drafts, listing_options=listing_options, static_mode=args.static_mode,
+                              minify=args.minify, precompress=args.precompress,
+                              search=search if args.search else None, site_url=args.site_url,
+                              feed_section=args.listing_section)
+        watch(watcher, args.interval, notifier)
 
 
 if __name__ == "__main__":
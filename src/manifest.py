@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+
+
+MANIFEST_PATH = os.path.join(".cache", "manifest.json")
+MANIFEST_VERSION = 5
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildManifest():
+    def __init__(self, path=MANIFEST_PATH, pages=None, static=None, derived=None, postprocessed=None,
+                 listings=None, feeds=None, transformed=None):
+        self.path = path
+        self.pages = pages if pages is not None else {}
+        self.static = static if static is not None else []
+        self.derived = derived if derived is not None else []
+        self.postprocessed = postprocessed if postprocessed is not None else {}
+        self.listings = listings if listings is not None else {}
+        self.feeds = feeds if feeds is not None else []
+        self.transformed = transformed if transformed is not None else {}
+
+    @classmethod
+    def load(cls, path=MANIFEST_PATH):
+        if not os.path.exists(path):
+            return cls(path)
+        try:
+            with open(path) as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return cls(path)
+        if data.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        return cls(
+            path,
+            data.get("pages", {}),
+            data.get("static", []),
+            data.get("derived", []),
+            data.get("postprocessed", {}),
+            data.get("listings", {}),
+            data.get("feeds", []),
+            data.get("transformed", {}),
+        )
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as file:
+            json.dump({
+                "version": MANIFEST_VERSION,
+                "pages": self.pages,
+                "static": self.static,
+                "derived": self.derived,
+                "postprocessed": self.postprocessed,
+                "listings": self.listings,
+                "feeds": self.feeds,
+                "transformed": self.transformed,
+            }, file, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def stale_reasons(self, source, dest_path, resolver):
+        entry = self.pages.get(source)
+        if entry is None:
+            return ["new page"]
+        if entry["output"] != dest_path:
+            return ["output moved"]
+        if not os.path.exists(dest_path):
+            return ["output missing"]
+        return resolver.changed(entry["deps"])
+
+    def record(self, source, source_hash, dest_path, deps, links=None):
+        self.pages[source] = {
+            "hash": source_hash,
+            "output": dest_path,
+            "deps": deps,
+            "links": links if links is not None else [],
+        }
+
+    def remove_stale(self, seen_sources):
+        removed = []
+        for source in sorted(set(self.pages) - set(seen_sources)):
+            output = self.pages.pop(source)["output"]
+            if os.path.exists(output):
+                os.remove(output)
+                removed.append(output)
+        return removed
@@ -1,42 +1,316 @@
-from converters import markdown_to_html_node
+from concurrent.futures import ProcessPoolExecutor
+from converters import iter_blocks, iter_blocks_html, markdown_to_html
+from dependencies import DependencyResolver, content_digest, dependency
+from io_pipeline import IO_WINDOW, IOPipeline, create_dirs
+from page_index import PageIndex, extract_title, scan_page, skip_front_matter, split_front_matter
+from profiler import BuildProfiler, get_profiler, set_profiler, stage
+from profiler import page as profile_page
+from render_context import RenderContext, get_render_context, set_render_context
+from search_index import write_terms
+from template import load_template, rewrite_urls
 import os
+import traceback
 
 
-def extract_title(markdown):
-    for line in markdown.split("\n"):
-        if line.startswith("# "):
-            return line[2:].strip()
-    raise Exception("No header found")
+# extract_title moved to page_index and is re-exported here for callers that still import it from this module.
+__all__ = [
+    "STREAM_THRESHOLD_BYTES",
+    "build_pages",
+    "collect_pages",
+    "extract_title",
+    "generate_page",
+    "generate_pages_recursive",
+    "init_worker",
+    "page_dest_path",
+    "render_chunk",
+    "render_page",
+    "render_pages",
+    "write_output",
+]
 
+STREAM_THRESHOLD_BYTES = 8 * 1024 * 1024
 
-def generate_page(from_path, template_path, dest_path, basepath):
+
+def generate_page(from_path, template_path, dest_path, basepath, info=None):
     print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    file = open(from_path)
-    file_contents = file.read()
-    file.close()
-    template = open(template_path)
-    template_contents = template.read()
-    template.close()
-    content = markdown_to_html_node(file_contents).to_html()
-    title = extract_title(file_contents)
-    if not os.path.exists(os.path.dirname(dest_path)):
-        os.makedirs(os.path.dirname(dest_path))
-    new_file = open(dest_path, 'x')
-    new_file.write(
-        template_contents
-        .replace("{{ Title }}", title)
-        .replace("{{ Content }}", content)
-        .replace('href="/', f'href="{basepath}')
-        .replace('src="/', f'src="{basepath}')
-    )
-    new_file.close()
-
-
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
-    for path in os.listdir(dir_path_content):
+    return render_page(from_path, template_path, dest_path, basepath, info)
+
+
+def write_output(dest_path, write):
+    tmp_path = dest_path + ".tmp"
+    try:
+        # The directory usually exists already (build_pages creates them up front), so only a failed open
+        # pays for creating it.
+        try:
+            new_file = open(tmp_path, "w")
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            new_file = open(tmp_path, "w")
+        with new_file:
+            write(new_file)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def render_page(from_path, template_path, dest_path, basepath, info=None):
+    if info is None:
+        info = scan_page(from_path, dest_path, os.path.dirname(dest_path))
+    if info.title is None:
+        raise Exception("No header found")
+    context = get_render_context()
+    pipeline = context.io_pipeline
+    links = []
+    texts = [] if context.search_dir is not None else None
+    includes = []
+    previous = context.collect(links, texts, includes)
+    try:
+        if pipeline is not None:
+            with stage("read"):
+                text = pipeline.read(from_path)
+            streaming = text is None
+        else:
+            text = None
+            streaming = os.path.getsize(from_path) > STREAM_THRESHOLD_BYTES
+        if streaming:
+            render_page_streaming(from_path, template_path, dest_path, basepath, info)
+        else:
+            render_page_in_memory(from_path, template_path, dest_path, basepath, info, text)
+    finally:
+        context.collect(*previous)
+    if texts is not None:
+        # Written from the worker so the parent only has to merge files, never hold every page's terms.
+        deps = {dependency("source", from_path): info.hash}
+        deps.update((dependency("partial", path), digest) for path, digest in includes)
+        with stage("search_terms"):
+            if pipeline is not None:
+                pipeline.write(dest_path, write_terms, context.search_dir, from_path, content_digest(deps), texts)
+            else:
+                write_terms(context.search_dir, from_path, content_digest(deps), texts)
+    return {"links": links, "includes": sorted(set(path for path, _ in includes))}
+
+
+def write_document(dest_path, document):
+    write_output(dest_path, lambda new_file: new_file.write(document))
+
+
+def render_page_in_memory(from_path, template_path, dest_path, basepath, info, text=None):
+    if text is None:
+        with stage("read"):
+            with open(from_path) as file:
+                text = file.read()
+    _, file_contents = split_front_matter(text)
+    with stage("template"):
+        template = load_template(template_path, basepath)
+    values = info.template_values()
+    values["Content"] = rewrite_urls(markdown_to_html(file_contents), basepath)
+
+    if get_profiler() is None:
+        pipeline = get_render_context().io_pipeline
+        if pipeline is not None:
+            pipeline.write(dest_path, write_document, dest_path, template.render(values))
+        else:
+            write_output(dest_path, lambda new_file: template.write(new_file, values))
+        return
+    # Writing through the template fuses substitution and I/O, so split them up when profiling.
+    with stage("template"):
+        document = template.render(values)
+    with stage("write"):
+        write_document(dest_path, document)
+
+
+def iter_streamed_content(file, basepath):
+    for chunk in iter_blocks_html(iter_blocks(file)):
+        yield rewrite_urls(chunk, basepath)
+
+
+def render_page_streaming(from_path, template_path, dest_path, basepath, info):
+    template = load_template(template_path, basepath)
+    values = info.template_values()
+    with open(from_path) as file:
+        values["Content"] = iter_streamed_content(skip_front_matter(file), basepath)
+        with stage("write"):
+            write_output(dest_path, lambda new_file: template.write(new_file, values))
+
+
+def page_dest_path(from_path, dir_path_content, dest_dir_path):
+    dest_path = os.path.join(dest_dir_path, os.path.relpath(from_path, dir_path_content))
+    return dest_path[:-len(".md")] + ".html"
+
+
+def collect_pages(dir_path_content, dest_dir_path, root_content=None):
+    if root_content is None:
+        root_content = dir_path_content
+    pages = []
+    for path in sorted(os.listdir(dir_path_content)):
         path = os.path.join(dir_path_content, path)
         if not os.path.isfile(path):
-            generate_pages_recursive(path, template_path, dest_dir_path, basepath)
+            pages.extend(collect_pages(path, dest_dir_path, root_content))
         elif path.endswith(".md"):
-            dest_path = os.path.join(dest_dir_path, os.path.relpath(path, "content"))
-            generate_page(path, template_path, dest_path.replace(".md", ".html"), basepath)
+            pages.append((path, page_dest_path(path, root_content, dest_dir_path)))
+    return pages
+
+
+def open_pipeline(context):
+    if context.io_threads > 0:
+        return IOPipeline(context.io_threads, IO_WINDOW, STREAM_THRESHOLD_BYTES)
+    return None
+
+
+def settled_pages(settled, waiting):
+    for dest_path, error in settled:
+        from_path, page = waiting.pop(dest_path)
+        if error is not None and page["error"] is None:
+            page = {"error": error}
+        yield from_path, dest_path, page
+
+
+def render_pages(pages, template_path, basepath, infos=None):
+    # Yields (from_path, dest_path, page) as each page is finished. With an I/O pipeline a page is held back
+    # until its queued writes have settled, so a failed write fails the page that queued it.
+    pipeline = get_render_context().io_pipeline
+    if pipeline is not None:
+        pipeline.prefetch(from_path for from_path, _ in pages)
+    waiting = {}
+    for i, (from_path, dest_path) in enumerate(pages):
+        try:
+            with profile_page(from_path):
+                page = render_page(from_path, template_path, dest_path, basepath, infos[i] if infos else None)
+            page["error"] = None
+        except Exception:
+            page = {"error": traceback.format_exc()}
+            if pipeline is not None:
+                pipeline.discard(from_path)
+        if pipeline is None:
+            yield from_path, dest_path, page
+            continue
+        if pipeline.is_pending(dest_path):
+            waiting[dest_path] = (from_path, page)
+        else:
+            yield from_path, dest_path, page
+        yield from settled_pages(pipeline.drain(), waiting)
+    if pipeline is not None:
+        yield from settled_pages(pipeline.flush(), waiting)
+
+
+def render_chunk(chunk, template_path, basepath, infos=None):
+    context = get_render_context()
+    result = {"pages": list(render_pages(chunk, template_path, basepath, infos)), "caches": context.drain(),
+              "profile": None}
+    profiler = get_profiler()
+    if profiler is not None and profiler.in_worker:
+        result["profile"] = profiler.drain()
+    return result
+
+
+def init_worker(context_options, profile):
+    # The worker's I/O pipeline lives as long as the process; render_chunk flushes it before returning.
+    context = RenderContext.for_worker(context_options)
+    context.io_pipeline = open_pipeline(context)
+    set_render_context(context)
+    if profile:
+        profiler = BuildProfiler()
+        profiler.in_worker = True
+        set_profiler(profiler)
+
+
+def chunk_pages(pages, jobs):
+    size = max(1, len(pages) // (jobs * 4))
+    return [pages[i:i + size] for i in range(0, len(pages), size)]
+
+
+def build_pages(pages, template_path, basepath, jobs=1, context=None, index=None):
+    if context is None:
+        context = RenderContext()
+    built = {}
+    failures = []
+
+    def chunk_infos(chunk):
+        if index is None:
+            return None
+        return [index.get(from_path) for from_path, _ in chunk]
+
+    def report(from_path, dest_path, page):
+        if page["error"] is None:
+            print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+            built[from_path] = page
+        else:
+            print(f"Failed to generate page from {from_path}:\n{page['error']}")
+            failures.append(from_path)
+
+    create_dirs(dest_path for _, dest_path in pages)
+    if jobs <= 1 or len(pages) <= 1:
+        # One pipeline serves the whole build; pages are reported as their writes settle.
+        previous = set_render_context(context)
+        context.io_pipeline = open_pipeline(context)
+        try:
+            for from_path, dest_path, page in render_pages(pages, template_path, basepath, chunk_infos(pages)):
+                report(from_path, dest_path, page)
+        finally:
+            if context.io_pipeline is not None:
+                context.io_pipeline.close()
+                context.io_pipeline = None
+            set_render_context(previous)
+        return built, failures
+
+    chunks = chunk_pages(pages, jobs)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                             initargs=(context.worker_options(), get_profiler() is not None)) as executor:
+        results = executor.map(
+            render_chunk,
+            chunks,
+            [template_path] * len(chunks),
+            [basepath] * len(chunks),
+            [chunk_infos(chunk) for chunk in chunks],
+        )
+        for result in results:
+            context.merge(result["caches"])
+            if result["profile"] is not None:
+                get_profiler().merge(result["profile"])
+            for from_path, dest_path, page in result["pages"]:
+                report(from_path, dest_path, page)
+    return built, failures
+
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath, manifest=None, jobs=1,
+                             context=None, index=None, drafts=False, explain=False):
+    if context is None:
+        context = RenderContext()
+    pages = collect_pages(dir_path_content, dest_dir_path)
+    if index is None:
+        index = PageIndex.build(pages, dest_dir_path)
+    unindexed = [from_path for from_path, _ in pages if from_path in index.errors]
+    for from_path in unindexed:
+        print(f"Failed to generate page from {from_path}:\n{index.errors[from_path]}")
+    seen = [from_path for from_path, _ in pages]
+    pages = [(from_path, dest_path) for from_path, dest_path in pages if from_path in index]
+    if not drafts:
+        pages = [(from_path, dest_path) for from_path, dest_path in pages if not index.get(from_path).draft]
+        seen = [from_path for from_path in seen if from_path not in index or not index.get(from_path).draft]
+    if manifest is not None:
+        resolver = DependencyResolver(index, template_path, basepath, context.image_attrs)
+        stale = []
+        for from_path, dest_path in pages:
+            reasons = manifest.stale_reasons(from_path, dest_path, resolver)
+            if reasons:
+                stale.append((from_path, dest_path))
+                if explain:
+                    print(f"Rebuilding {from_path}: {'; '.join(reasons)}")
+    else:
+        stale = pages
+
+    built, failures = build_pages(stale, template_path, basepath, jobs, context, index)
+
+    if manifest is not None:
+        outputs = dict(pages)
+        for from_path, page in built.items():
+            manifest.record(from_path, index.get(from_path).hash, outputs[from_path],
+                            resolver.page_deps(from_path, page["links"], page["includes"]), page["links"])
+        # Pages that failed to scan keep their previous output.
+        for output in manifest.remove_stale(seen):
+            print(f"Removing stale page {output}")
+    failures = unindexed + failures
+    if failures:
+        raise Exception(f"Failed to generate {len(failures)} page(s): {', '.join(failures)}")
@@ -0,0 +1,241 @@
+import hashlib
+import os
+import re
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+SCAN_CHUNK_SIZE = 1 << 20
+FRONT_MATTER_RE = re.compile(r"\A---[ \t]*\r?\n(.*?)^---[ \t]*(?:\r?\n|\Z)", re.DOTALL | re.MULTILINE)
+FRONT_MATTER_KEY_RE = re.compile(r"\s*[\w-]+\s*:")
+TITLE_RE = re.compile(r"^# (.*)$", re.MULTILINE)
+TITLE_BYTES_RE = re.compile(rb"^# (.*?)\r?$", re.MULTILINE)
+WHITESPACE = b" \t\n\r\x0b\x0c"
+
+
+def extract_title(markdown):
+    match = TITLE_RE.search(markdown)
+    if match is None:
+        raise Exception("No header found")
+    return match.group(1).strip()
+
+
+def parse_value(value):
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    if value.startswith("[") and value.endswith("]"):
+        return [parse_value(item) for item in value[1:-1].split(",") if item.strip()]
+    if value.lower() in ("true", "yes"):
+        return True
+    if value.lower() in ("false", "no"):
+        return False
+    return value
+
+
+def parse_front_matter(text):
+    # Returns None when the block is not key/value lines, e.g. body text between two --- thematic breaks.
+    meta = {}
+    key = None
+    for line in text.splitlines():
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        if line.lstrip().startswith("- ") and key is not None:
+            if not isinstance(meta[key], list):
+                meta[key] = []
+            meta[key].append(parse_value(line.lstrip()[2:]))
+            continue
+        if FRONT_MATTER_KEY_RE.match(line) is None:
+            return None
+        key, value = line.split(":", 1)
+        key = key.strip().lower()
+        meta[key] = parse_value(value) if value.strip() else []
+    return meta
+
+
+def split_front_matter(markdown):
+    match = FRONT_MATTER_RE.match(markdown)
+    meta = parse_front_matter(match.group(1)) if match is not None else None
+    if meta is None:
+        return {}, markdown
+    return meta, markdown[match.end():]
+
+
+def skip_front_matter(lines):
+    lines = iter(lines)
+    for line in lines:
+        if line.rstrip() != "---":
+            yield line
+            break
+        skipped = [line]
+        for line in lines:
+            skipped.append(line)
+            if line.rstrip() == "---":
+                if parse_front_matter("".join(skipped[1:-1])) is None:
+                    yield from skipped
+                break
+        else:
+            # Never closed, so it was not front matter after all.
+            yield from skipped
+        break
+    yield from lines
+
+
+def page_url(output, dest_dir):
+    url = "/" + os.path.relpath(output, dest_dir).replace(os.sep, "/")
+    if url.endswith("/index.html"):
+        return url[:-len("index.html")]
+    return url
+
+
+class PageInfo():
+    __slots__ = ("source", "output", "url", "hash", "title", "date", "tags", "draft", "words", "meta")
+
+    def __init__(self, source, output, url, hash, title=None, date=None, tags=(), draft=False, words=0, meta=None):
+        self.source = source
+        self.output = output
+        self.url = url
+        self.hash = hash
+        self.title = title
+        self.date = date
+        self.tags = list(tags)
+        self.draft = draft
+        self.words = words
+        self.meta = meta if meta is not None else {}
+
+    def __eq__(self, other):
+        return isinstance(other, PageInfo) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    def __repr__(self):
+        return f"PageInfo({self.source}, {self.title}, {self.date}, {self.tags}, {self.draft}, {self.words})"
+
+    def template_values(self):
+        return {
+            "Title": self.title,
+            "Date": self.date or "",
+            "Tags": ", ".join(self.tags),
+            "WordCount": str(self.words),
+        }
+
+
+def scan_page(source, output, dest_dir="docs"):
+    # One chunked read hashes the file and collects its metadata, so a page is never buffered whole
+    # and the pre-pass costs no more I/O than hashing alone did.
+    digest = hashlib.sha256()
+    meta = {}
+    title = None
+    words = 0
+    in_word = False
+    carry = b""
+    first = True
+    with open(source, "rb") as file:
+        for chunk in iter(lambda: file.read(SCAN_CHUNK_SIZE), b""):
+            digest.update(chunk)
+            if first:
+                first = False
+                head = chunk.decode("utf-8", "ignore")
+                match = FRONT_MATTER_RE.match(head)
+                parsed = parse_front_matter(match.group(1)) if match is not None else None
+                if parsed is not None:
+                    meta = parsed
+                    chunk = chunk[len(head[:match.end()].encode()):]
+            if not chunk:
+                continue
+            words += len(chunk.split())
+            if in_word and chunk[0] not in WHITESPACE:
+                words -= 1
+            in_word = chunk[-1] not in WHITESPACE
+            if title is None:
+                text = carry + chunk
+                match = TITLE_BYTES_RE.search(text)
+                if match is not None and match.end() < len(text):
+                    title = extract_title(match.group(0).decode())
+                else:
+                    carry = text[text.rfind(b"\n") + 1:]
+    if title is None:
+        match = TITLE_BYTES_RE.search(carry)
+        if match is not None:
+            title = extract_title(match.group(0).decode())
+    tags = meta.get("tags", [])
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
+    date = meta.get("date")
+    return PageInfo(
+        source,
+        output,
+        page_url(output, dest_dir),
+        digest.hexdigest(),
+        title=meta.get("title") or title,
+        date=str(date) if date else None,
+        tags=[str(tag) for tag in tags],
+        draft=meta.get("draft") is True,
+        words=words,
+        meta=meta,
+    )
+
+
+class PageIndex():
+    def __init__(self, dest_dir="docs"):
+        self.dest_dir = dest_dir
+        self.pages = {}
+        self.errors = {}
+
+    @classmethod
+    def build(cls, pages, dest_dir="docs", workers=8):
+        index = cls(dest_dir)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for source, info, error in executor.map(lambda page: index.scan(page[0], page[1]), pages):
+                index.store(source, info, error)
+        return index
+
+    def scan(self, source, output):
+        # A page that cannot be scanned is reported with the other page failures instead of aborting the build.
+        try:
+            return source, scan_page(source, output, self.dest_dir), None
+        except Exception:
+            return source, None, traceback.format_exc()
+
+    def store(self, source, info, error):
+        if error is None:
+            self.pages[source] = info
+            self.errors.pop(source, None)
+        else:
+            self.pages.pop(source, None)
+            self.errors[source] = error
+
+    def update(self, source, output):
+        source, info, error = self.scan(source, output)
+        self.store(source, info, error)
+        return info
+
+    def remove(self, source):
+        self.errors.pop(source, None)
+        return self.pages.pop(source, None)
+
+    def get(self, source):
+        return self.pages.get(source)
+
+    def __contains__(self, source):
+        return source in self.pages
+
+    def __len__(self):
+        return len(self.pages)
+
+    def query(self, tag=None, drafts=False):
+        pages = [
+            info for info in self.pages.values()
+            if (drafts or not info.draft) and (tag is None or tag in info.tags)
+        ]
+        # Newest first; undated pages go last, in path order.
+        pages.sort(key=lambda info: info.source)
+        pages.sort(key=lambda info: info.date or "", reverse=True)
+        return pages
+
+    def tags(self, drafts=False):
+        tags = {}
+        for info in self.query(drafts=drafts):
+            for tag in info.tags:
+                tags.setdefault(tag, []).append(info)
+        return dict(sorted(tags.items()))
@@ -2,18 +2,19 @@ from htmlnode import HTMLNode
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
-    def to_html(self):
+    def iter_html(self):
         if not self.tag:
             raise ValueError
 
         if not self.children:
             raise ValueError("parent does not have children")
 
-        output = f"<{self.tag}{self.props_to_html()}>"
+        yield f"<{self.tag}{self.props_to_html()}>"
         for child in self.children:
-            output += child.to_html()
-        output = output + f"</{self.tag}>"
-        return output
+            yield from child.iter_html()
+        yield f"</{self.tag}>"
@@ -0,0 +1,135 @@
+import gzip
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from manifest import hash_bytes
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".json", ".xml", ".svg", ".txt")
+PROTECTED_HTML_RE = re.compile(r"(<(pre|textarea|script|style)\b.*?</\2>)", re.DOTALL | re.IGNORECASE)
+HTML_COMMENT_RE = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.DOTALL)
+
+
+def minify_html(html):
+    parts = PROTECTED_HTML_RE.split(html)
+    output = []
+    # split() returns text, protected element, tag name, text, ... so every third item is plain markup.
+    for i in range(0, len(parts), 3):
+        text = HTML_COMMENT_RE.sub("", parts[i])
+        # Whitespace containing a newline between tags is template indentation; other runs collapse to one space.
+        text = re.sub(r"(^|>)\s*\n\s*(?=<|$)", r"\1", text)
+        text = re.sub(r"\s+", " ", text)
+        output.append(text)
+        if i + 1 < len(parts):
+            output.append(parts[i + 1])
+    return "".join(output).strip()
+
+
+def minify_css(css):
+    css = CSS_COMMENT_RE.sub("", css)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    css = css.replace(";}", "}")
+    return css.strip()
+
+
+def static_transforms(minify=False):
+    return {".css": minify_css} if minify else None
+
+
+def write_bytes(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+
+
+def compressed_siblings(path):
+    siblings = [path + ".gz"]
+    if brotli is not None:
+        siblings.append(path + ".br")
+    return siblings
+
+
+def precompress(path, data):
+    write_bytes(path + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        write_bytes(path + ".br", brotli.compress(data))
+
+
+class PostProcessor():
+    def __init__(self, manifest, minify=False, compress=False, workers=8):
+        self.manifest = manifest
+        self.minify = minify
+        self.compress = compress
+        self.workers = workers
+
+    def is_current(self, path):
+        record = self.manifest.postprocessed.get(path)
+        if record is None:
+            return False
+        stat = os.stat(path)
+        if record[0] != stat.st_size or record[1] != stat.st_mtime_ns:
+            return False
+        return record[3] == [self.minify, self.compress] and self.siblings_exist(path)
+
+    def siblings_exist(self, path):
+        return not self.compress or all(os.path.exists(sibling) for sibling in compressed_siblings(path))
+
+    def process_file(self, path, minify):
+        with open(path, "rb") as file:
+            data = file.read()
+        if minify and path.endswith(".html"):
+            minified = minify_html(data.decode()).encode()
+            if minified != data:
+                data = minified
+                write_bytes(path, data)
+        stat = os.stat(path)
+        options = [self.minify, self.compress]
+        record = [stat.st_size, stat.st_mtime_ns, hash_bytes(data), options]
+        previous = self.manifest.postprocessed.get(path)
+        if previous is not None and previous[2:] == record[2:] and self.siblings_exist(path):
+            return path, record, False
+        if self.compress:
+            precompress(path, data)
+        return path, record, True
+
+    def run(self, paths, minify_paths=(), prune=True):
+        # Only generated pages are minified in place; static files are minified while they are synced.
+        minify_paths = set(minify_paths)
+        paths = [path for path in paths if path.endswith(COMPRESSIBLE_EXTENSIONS) and os.path.exists(path)]
+        pending = [path for path in paths if not self.is_current(path)]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(
+                lambda path: self.process_file(path, self.minify and path in minify_paths),
+                pending,
+            ))
+        processed = []
+        for path, record, changed in results:
+            self.manifest.postprocessed[path] = record
+            if changed:
+                processed.append(path)
+
+        if prune:
+            self.forget(set(self.manifest.postprocessed) - set(paths))
+        return processed
+
+    def forget(self, paths):
+        for path in sorted(paths):
+            self.manifest.postprocessed.pop(path, None)
+            for sibling in (path + ".gz", path + ".br"):
+                if os.path.exists(sibling):
+                    os.remove(sibling)
+
+
+def postprocess_site(manifest, minify=False, compress=False, extra_outputs=()):
+    page_outputs = [entry["output"] for entry in manifest.pages.values()] + list(manifest.listings)
+    outputs = page_outputs + manifest.static + manifest.derived + manifest.feeds + list(extra_outputs)
+    return PostProcessor(manifest, minify, compress).run(outputs, page_outputs)
@@ -0,0 +1,140 @@
+import json
+import time
+
+
+_profiler = None
+
+
+class NullStage():
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_STAGE = NullStage()
+
+
+class Stage():
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        self.timings[self.name] = self.timings.get(self.name, 0.0) + elapsed
+        return False
+
+
+class PageTimer():
+    def __init__(self, profiler, page):
+        self.profiler = profiler
+        self.page = page
+        self.timings = {}
+
+    def __enter__(self):
+        self.previous = self.profiler.current
+        self.profiler.current = self.timings
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings["total"] = self.timings.get("total", 0.0) + time.perf_counter() - self.started
+        self.profiler.current = self.previous
+        self.profiler.record_page(self.page, self.timings)
+        return False
+
+
+class BuildProfiler():
+    def __init__(self):
+        self.pages = {}
+        self.hooks = []
+        self.current = None
+        self.in_worker = False
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def page(self, page):
+        return PageTimer(self, page)
+
+    def stage(self, name):
+        if self.current is None:
+            return NULL_STAGE
+        return Stage(self.current, name)
+
+    def record_page(self, page, timings):
+        existing = self.pages.setdefault(page, {})
+        for name, seconds in timings.items():
+            existing[name] = existing.get(name, 0.0) + seconds
+        for hook in self.hooks:
+            hook(page, timings)
+
+    def drain(self):
+        pages = self.pages
+        self.pages = {}
+        return pages
+
+    def merge(self, pages):
+        for page, timings in pages.items():
+            self.record_page(page, timings)
+
+    def report(self, top_n=10):
+        # Names in parentheses are site-wide stages such as "(static)" rather than pages.
+        pages = {page: timings for page, timings in self.pages.items() if not page.startswith("(")}
+        site = {page: timings for page, timings in self.pages.items() if page.startswith("(")}
+        totals = {}
+        for timings in pages.values():
+            for name, seconds in timings.items():
+                totals[name] = totals.get(name, 0.0) + seconds
+        slowest = sorted(pages.items(), key=lambda item: item[1].get("total", 0.0), reverse=True)
+        return {
+            "pages": len(pages),
+            "totals": dict(sorted(totals.items())),
+            "site": site,
+            "slowest": [{"page": page, **timings} for page, timings in slowest[:top_n]],
+            "per_page": pages,
+        }
+
+    def write_report(self, path, top_n=10):
+        report = self.report(top_n)
+        with open(path, "w") as file:
+            json.dump(report, file, indent=1, sort_keys=True)
+        return report
+
+
+def set_profiler(profiler):
+    global _profiler
+    _profiler = profiler
+
+
+def get_profiler():
+    return _profiler
+
+
+def stage(name):
+    if _profiler is None:
+        return NULL_STAGE
+    return _profiler.stage(name)
+
+
+def page(path):
+    if _profiler is None:
+        return NULL_STAGE
+    return _profiler.page(path)
+
+
+def print_report(report):
+    print(f"Profiled {report['pages']} page(s)")
+    for name, seconds in report["totals"].items():
+        print(f"  {name:<20}{seconds * 1000:>10.1f}ms")
+    for name, timings in report["site"].items():
+        print(f"  {name:<20}{timings.get('total', 0.0) * 1000:>10.1f}ms")
+    print("Slowest pages:")
+    for entry in report["slowest"]:
+        print(f"  {entry.get('total', 0.0) * 1000:>10.1f}ms  {entry['page']}")
@@ -0,0 +1,78 @@
+from block_cache import BlockCache
+from io_pipeline import IO_THREADS
+
+
+PARTIALS_DIR = "partials"
+
+
+def cache_options(cache):
+    return (cache.maxsize, cache.path) if cache is not None else None
+
+
+def load_cache(options):
+    if options is None:
+        return None
+    maxsize, path = options
+    return BlockCache.load(maxsize, path, record_added=True)
+
+
+class RenderContext():
+    # Everything rendering reads besides the page itself: the build's caches, image attributes and output
+    # options, plus the collectors of the page being rendered. A build installs one context; each worker
+    # process installs its own, with caches that record what they add so the parent can merge it.
+    def __init__(self, block_cache=None, highlight_cache=None, image_attrs=None, search_dir=None,
+                 partials_dir=PARTIALS_DIR, io_threads=IO_THREADS):
+        self.block_cache = block_cache
+        self.highlight_cache = highlight_cache
+        self.image_attrs = image_attrs
+        self.search_dir = search_dir
+        self.partials_dir = partials_dir
+        self.io_threads = io_threads
+        self.partials = {}
+        self.partial_stack = []
+        self.links = None
+        self.texts = None
+        self.includes = None
+        self.io_pipeline = None
+
+    def worker_options(self):
+        return (cache_options(self.block_cache), cache_options(self.highlight_cache), self.image_attrs,
+                self.search_dir, self.partials_dir, self.io_threads)
+
+    @classmethod
+    def for_worker(cls, options):
+        block_cache, highlight_cache, image_attrs, search_dir, partials_dir, io_threads = options
+        return cls(load_cache(block_cache), load_cache(highlight_cache), image_attrs, search_dir, partials_dir,
+                   io_threads)
+
+    def caches(self):
+        return (self.block_cache, self.highlight_cache)
+
+    def drain(self):
+        return [cache.drain() if cache is not None and cache.record_added else None for cache in self.caches()]
+
+    def merge(self, deltas):
+        for cache, delta in zip(self.caches(), deltas):
+            if delta is not None:
+                cache.merge(delta)
+
+    def collect(self, links, texts, includes):
+        previous = (self.links, self.texts, self.includes)
+        self.links = links
+        self.texts = texts
+        self.includes = includes
+        return previous
+
+
+_render_context = RenderContext()
+
+
+def set_render_context(context):
+    global _render_context
+    previous = _render_context
+    _render_context = context
+    return previous
+
+
+def get_render_context():
+    return _render_context
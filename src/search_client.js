@@ -0,0 +1,74 @@
+// Client for the index written by search_index.py: docs/search/index.json lists the pages and every
+// <shard>.json holds the front coded postings of the terms hashing to it.
+(function () {
+  var base = document.currentScript.src.replace(/search\.js(\?.*)?$/, "");
+  var index = null;
+  var shards = {};
+
+  function load(name) {
+    return fetch(base + name).then(function (response) {
+      return response.json();
+    });
+  }
+
+  function decode(entries) {
+    var terms = {};
+    var previous = "";
+    entries.forEach(function (entry) {
+      var term = previous.slice(0, entry[0]) + entry[1];
+      terms[term] = entry[2];
+      previous = term;
+    });
+    return terms;
+  }
+
+  function shardOf(term, count) {
+    var value = 0x811c9dc5;
+    new TextEncoder().encode(term).forEach(function (byte) {
+      value = Math.imul(value ^ byte, 0x01000193) >>> 0;
+    });
+    return value % count;
+  }
+
+  function tokenize(text) {
+    return (text.toLowerCase().match(/[\p{L}\p{N}_]+/gu) || []).filter(function (term) {
+      return term.length >= 2 && term.length <= 32;
+    });
+  }
+
+  window.siteSearch = function (query) {
+    var terms = tokenize(query).filter(function (term, i, all) {
+      return all.indexOf(term) === i;
+    });
+    index = index || load("index.json");
+    return index.then(function (meta) {
+      var live = meta.docs.filter(Boolean).length;
+      return Promise.all(terms.map(function (term) {
+        var shard = shardOf(term, meta.shards);
+        shards[shard] = shards[shard] || load(shard + ".json").then(decode);
+        return shards[shard].then(function (postings) {
+          return postings[term] || [];
+        });
+      })).then(function (lists) {
+        var scores = {};
+        var matches = {};
+        lists.forEach(function (flat) {
+          var idf = Math.log(1 + live / Math.max(1, flat.length / 2));
+          var doc = 0;
+          for (var i = 0; i < flat.length; i += 2) {
+            doc += flat[i];
+            scores[doc] = (scores[doc] || 0) + flat[i + 1] * idf;
+            matches[doc] = (matches[doc] || 0) + 1;
+          }
+        });
+        return Object.keys(scores).filter(function (doc) {
+          return matches[doc] === terms.length;
+        }).sort(function (a, b) {
+          return scores[b] - scores[a];
+        }).map(function (doc) {
+          return { url: meta.docs[doc][0], title: meta.docs[doc][1], score: scores[doc] };
+        });
+      });
+    });
+  };
+})();
@@ -0,0 +1,234 @@
+import json
+import os
+import re
+import shutil
+from collections import Counter
+from dependencies import content_digest
+from manifest import hash_bytes
+from static_sync import copy_file
+
+
+SEARCH_DIR = os.path.join(".cache", "search")
+SEARCH_SHARDS = 64
+SEARCH_VERSION = 2
+TOKEN_RE = re.compile(r"\w+")
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 32
+CLIENT_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "search_client.js")
+
+
+def tokenize(texts):
+    counts = Counter(TOKEN_RE.findall("\n".join(texts).lower()))
+    return {term: tf for term, tf in counts.items() if MIN_TERM_LENGTH <= len(term) <= MAX_TERM_LENGTH}
+
+
+def term_shard(term, shards):
+    # 32-bit FNV-1a, mirrored by the client so it fetches only the shards holding the query terms.
+    value = 0x811c9dc5
+    for byte in term.encode():
+        value = ((value ^ byte) * 0x01000193) & 0xffffffff
+    return value % shards
+
+
+def terms_path(search_dir, source):
+    return os.path.join(search_dir, "pages", hash_bytes(source.encode())[:32] + ".json")
+
+
+def write_json(path, data):
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as file:
+        file.write(json.dumps(data, separators=(",", ":")))
+    os.replace(tmp_path, path)
+
+
+def read_json(path, default=None):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return default
+
+
+def write_terms(search_dir, source, digest, texts):
+    # The page's content digest lets a later --search build spot terms left behind by a render that skipped them.
+    write_json(terms_path(search_dir, source), {"hash": digest, "terms": tokenize(texts)})
+
+
+def read_terms(search_dir, source):
+    return read_json(terms_path(search_dir, source), {})
+
+
+def encode_shard(postings):
+    # Terms are sorted and front coded as [shared prefix length, suffix, postings]; postings are flat
+    # [doc id delta, term frequency, ...] pairs so long lists compress to small numbers.
+    entries = []
+    previous = ""
+    for term in sorted(postings):
+        shared = 0
+        limit = min(len(term), len(previous))
+        while shared < limit and term[shared] == previous[shared]:
+            shared += 1
+        flat = []
+        last = 0
+        for doc, tf in sorted(postings[term]):
+            flat.append(doc - last)
+            flat.append(tf)
+            last = doc
+        entries.append([shared, term[shared:], flat])
+        previous = term
+    return entries
+
+
+def decode_shard(entries):
+    postings = {}
+    previous = ""
+    for shared, suffix, flat in entries:
+        term = previous[:shared] + suffix
+        docs = []
+        doc = 0
+        for i in range(0, len(flat), 2):
+            doc += flat[i]
+            docs.append([doc, flat[i + 1]])
+        postings[term] = docs
+        previous = term
+    return postings
+
+
+def doc_url(info, basepath):
+    return basepath.rstrip("/") + info.url if info is not None else None
+
+
+class SearchIndex():
+    def __init__(self, search_dir=SEARCH_DIR, dest_dir="docs", shards=SEARCH_SHARDS):
+        self.search_dir = search_dir
+        self.dest_dir = dest_dir
+        self.output_dir = os.path.join(dest_dir, "search")
+        self.shards = shards
+
+    def state_path(self):
+        return os.path.join(self.search_dir, "docs.json")
+
+    def shard_path(self, shard):
+        return os.path.join(self.output_dir, f"{shard}.json")
+
+    def outputs(self):
+        if not os.path.isdir(self.output_dir):
+            return []
+        return [os.path.join(self.output_dir, name) for name in sorted(os.listdir(self.output_dir))]
+
+    def load_state(self):
+        state = read_json(self.state_path())
+        valid = (
+            state is not None
+            and state.get("version") == SEARCH_VERSION
+            and state.get("shards") == self.shards
+            and os.path.exists(os.path.join(self.output_dir, "index.json"))
+        )
+        if not valid:
+            return {}, None
+        return state["docs"], state.get("basepath")
+
+    def missing_terms(self, pages):
+        return [
+            source for source, entry in pages.items()
+            if read_terms(self.search_dir, source).get("hash") != content_digest(entry["deps"])
+        ]
+
+    def update(self, manifest, index, basepath="/"):
+        docs, indexed_basepath = self.load_state()
+        rebuild = not docs
+        # Keyed on the content digest rather than the source hash, so a page rebuilt because one of its
+        # partials changed is indexed again too.
+        current = {source: content_digest(entry["deps"]) for source, entry in manifest.pages.items()}
+        changed = [source for source in sorted(current) if source not in docs or docs[source][3] != current[source]]
+        removed = sorted(set(docs) - set(current))
+        stale_docs = {}
+        for source in changed + removed:
+            if source in docs:
+                doc_id, _, _, _, shards = docs[source]
+                for shard in shards:
+                    stale_docs.setdefault(shard, set()).add(doc_id)
+        for source in removed:
+            del docs[source]
+        used = set(entry[0] for entry in docs.values())
+        next_id = max(used, default=-1) + 1
+        free_ids = sorted(set(range(next_id)) - used)
+
+        # Each changed page's terms are spilled to per-shard files so a full build of a large site only ever
+        # holds one shard's postings in memory.
+        spill_dir = os.path.join(self.search_dir, "spill")
+        if os.path.exists(spill_dir):
+            shutil.rmtree(spill_dir)
+        os.makedirs(spill_dir)
+        spill_files = {}
+        for source in changed:
+            if source in docs:
+                doc_id = docs[source][0]
+            elif free_ids:
+                doc_id = free_ids.pop(0)
+            else:
+                doc_id = next_id
+                next_id += 1
+            terms = read_terms(self.search_dir, source).get("terms", {})
+            by_shard = {}
+            for term, tf in terms.items():
+                by_shard.setdefault(term_shard(term, self.shards), {})[term] = tf
+            for shard, shard_terms in by_shard.items():
+                if shard not in spill_files:
+                    spill_files[shard] = open(os.path.join(spill_dir, f"{shard}.jsonl"), "w")
+                spill_files[shard].write(json.dumps([doc_id, shard_terms]) + "\n")
+            info = index.get(source)
+            title = info.title if info is not None else None
+            docs[source] = [doc_id, doc_url(info, basepath), title, current[source], sorted(by_shard)]
+        # Doc URLs carry the basepath, so a new one rewrites the doc table without indexing any page again.
+        rebased = indexed_basepath != basepath
+        if rebased:
+            for source, entry in docs.items():
+                entry[1] = doc_url(index.get(source), basepath)
+
+        for file in spill_files.values():
+            file.close()
+
+        affected = range(self.shards) if rebuild else sorted(set(spill_files) | set(stale_docs))
+        for shard in affected:
+            postings = {} if rebuild else decode_shard(read_json(self.shard_path(shard), []))
+            drop = stale_docs.get(shard)
+            if drop:
+                for term in list(postings):
+                    postings[term] = [posting for posting in postings[term] if posting[0] not in drop]
+                    if not postings[term]:
+                        del postings[term]
+            spill_path = os.path.join(spill_dir, f"{shard}.jsonl")
+            if os.path.exists(spill_path):
+                with open(spill_path) as file:
+                    for line in file:
+                        doc_id, shard_terms = json.loads(line)
+                        for term, tf in shard_terms.items():
+                            postings.setdefault(term, []).append([doc_id, tf])
+            write_json(self.shard_path(shard), encode_shard(postings))
+        shutil.rmtree(spill_dir)
+
+        if rebuild or changed or removed or rebased:
+            table = [None] * (max((entry[0] for entry in docs.values()), default=-1) + 1)
+            for doc_id, url, title, _, _ in docs.values():
+                table[doc_id] = [url, title]
+            write_json(os.path.join(self.output_dir, "index.json"), {
+                "version": SEARCH_VERSION,
+                "shards": self.shards,
+                "docs": table,
+            })
+            write_json(self.state_path(), {"version": SEARCH_VERSION, "shards": self.shards, "basepath": basepath,
+                                           "docs": docs})
+        client_path = os.path.join(self.output_dir, "search.js")
+        if not os.path.exists(client_path) or os.path.getmtime(client_path) < os.path.getmtime(CLIENT_SCRIPT):
+            copy_file(CLIENT_SCRIPT, client_path)
+        return changed, removed
+
+    def clear(self):
+        if os.path.exists(self.output_dir):
+            shutil.rmtree(self.output_dir)
+        if os.path.exists(self.search_dir):
+            shutil.rmtree(self.search_dir)
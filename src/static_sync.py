@@ -0,0 +1,122 @@
+import fcntl
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from manifest import hash_file
+
+
+FICLONE = 0x40049409
+LINK_MODES = ("copy", "hardlink", "reflink")
+
+
+def collect_static(src_dir):
+    files = []
+    for root, dirs, names in os.walk(src_dir):
+        dirs.sort()
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            files.append((path, os.path.relpath(path, src_dir)))
+    return files
+
+
+def static_transform(src_path, transforms):
+    transform = (transforms or {}).get(os.path.splitext(src_path)[1])
+    return transform, transform.__name__ if transform is not None else None
+
+
+def needs_copy(src_path, dest_path, checksum=False, transform=None, applied=None):
+    # `transform` names the transform this build applies and `applied` the one recorded for the existing output.
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return True
+    if transform != applied:
+        return True
+    src_stat = os.stat(src_path)
+    if transform is not None:
+        # Transformed outputs differ from their source in size and content but inherit its mtime.
+        return src_stat.st_mtime_ns != dest_stat.st_mtime_ns
+    if src_stat.st_size != dest_stat.st_size:
+        return True
+    if checksum:
+        return hash_file(src_path) != hash_file(dest_path)
+    return src_stat.st_mtime_ns != dest_stat.st_mtime_ns
+
+
+def reflink(src_path, dest_path):
+    with open(src_path, "rb") as src, open(dest_path, "wb") as dest:
+        fcntl.ioctl(dest.fileno(), FICLONE, src.fileno())
+    shutil.copystat(src_path, dest_path)
+
+
+def copy_file(src_path, dest_path, link_mode="copy", transform=None):
+    tmp_path = dest_path + ".tmp"
+    try:
+        if transform is not None:
+            with open(src_path) as src, open(tmp_path, "w") as dest:
+                dest.write(transform(src.read()))
+            shutil.copystat(src_path, tmp_path)
+        elif link_mode == "hardlink":
+            try:
+                os.link(src_path, tmp_path)
+            except OSError:
+                shutil.copy2(src_path, tmp_path)
+        elif link_mode == "reflink":
+            try:
+                reflink(src_path, tmp_path)
+            except OSError:
+                shutil.copy2(src_path, tmp_path)
+        else:
+            shutil.copy2(src_path, tmp_path)
+        os.replace(tmp_path, dest_path)
+    finally:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+    return dest_path
+
+
+def sync_static(src_dir, dest_dir, manifest=None, checksum=False, link_mode="copy", workers=8, transforms=None):
+    if link_mode not in LINK_MODES:
+        raise ValueError(f"Unknown link mode '{link_mode}', expected one of {', '.join(LINK_MODES)}")
+    files = collect_static(src_dir) if os.path.exists(src_dir) else []
+    outputs = [os.path.join(dest_dir, rel_path) for _, rel_path in files]
+
+    directories = set(os.path.dirname(dest_path) for dest_path in outputs)
+    for directory in sorted(directories):
+        os.makedirs(directory, exist_ok=True)
+
+    applied = manifest.transformed if manifest is not None else {}
+    copies = []
+    transformed = {}
+    for (src_path, _), dest_path in zip(files, outputs):
+        transform, name = static_transform(src_path, transforms)
+        if name is not None:
+            transformed[dest_path] = name
+        if needs_copy(src_path, dest_path, checksum, name, applied.get(dest_path)):
+            copies.append((src_path, dest_path, transform))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        copied = list(executor.map(lambda job: copy_file(job[0], job[1], link_mode, job[2]), copies))
+
+    removed = []
+    if manifest is not None:
+        for dest_path in sorted(set(manifest.static) - set(outputs)):
+            if os.path.exists(dest_path):
+                os.remove(dest_path)
+                removed.append(dest_path)
+        manifest.static = outputs
+        manifest.transformed = transformed
+    return copied, removed
+
+
+def sync_file(src_path, dest_path, manifest, link_mode="copy", transforms=None):
+    # Copies one changed static file the way sync_static would and records it in the manifest.
+    transform, name = static_transform(src_path, transforms)
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    copy_file(src_path, dest_path, link_mode, transform)
+    if dest_path not in manifest.static:
+        manifest.static.append(dest_path)
+    if name is not None:
+        manifest.transformed[dest_path] = name
+    else:
+        manifest.transformed.pop(dest_path, None)
+    return dest_path
@@ -0,0 +1,55 @@
+import os
+import re
+
+
+PLACEHOLDER_RE = re.compile(r"{{ (\w+) }}")
+
+_template_cache = {}
+
+
+def rewrite_urls(html, basepath):
+    if basepath == "/" or '="/' not in html:
+        return html
+    return html.replace('href="/', f'href="{basepath}').replace('src="/', f'src="{basepath}')
+
+
+class CompiledTemplate():
+    def __init__(self, source, basepath="/"):
+        self.segments = []
+        self.slots = []
+        pos = 0
+        for match in PLACEHOLDER_RE.finditer(source):
+            self.segments.append(rewrite_urls(source[pos:match.start()], basepath))
+            self.slots.append(match.group(1))
+            pos = match.end()
+        self.segments.append(rewrite_urls(source[pos:], basepath))
+
+    def iter_render(self, values):
+        for segment, slot in zip(self.segments, self.slots):
+            yield segment
+            value = values.get(slot)
+            if value is None:
+                yield f"{{{{ {slot} }}}}"
+            elif isinstance(value, str):
+                yield value
+            else:
+                yield from value
+        yield self.segments[-1]
+
+    def render(self, values):
+        return "".join(self.iter_render(values))
+
+    def write(self, fp, values):
+        fp.writelines(self.iter_render(values))
+
+
+def load_template(path, basepath="/"):
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _template_cache.get((path, basepath))
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    with open(path) as file:
+        compiled = CompiledTemplate(file.read(), basepath)
+    _template_cache[(path, basepath)] = (signature, compiled)
+    return compiled
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+
+from block_cache import BlockCache
+from converters import markdown_to_html_node
+from render_context import RenderContext, set_render_context
+
+
+class TestBlockCache(unittest.TestCase):
+    def setUp(self):
+        self.context = RenderContext()
+        self.previous_context = set_render_context(self.context)
+
+    def tearDown(self):
+        set_render_context(self.previous_context)
+
+    def test_lru_eviction(self):
+        cache = BlockCache(maxsize=2)
+        cache.put("a", "<p>a</p>")
+        cache.put("b", "<p>b</p>")
+        cache.get("a")
+        cache.put("c", "<p>c</p>")
+        self.assertEqual(cache.get("b"), None)
+        self.assertEqual(cache.get("a"), "<p>a</p>")
+        self.assertEqual(cache.get("c"), "<p>c</p>")
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+
+    def test_cached_render_matches_uncached(self):
+        md = "# Title\n\nSame **block**\n\n- one\n- two\n\nSame **block**"
+        expected = markdown_to_html_node(md).to_html()
+        cache = BlockCache()
+        self.context.block_cache = cache
+        self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+        self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+        self.assertEqual((cache.hits, cache.misses), (5, 3))
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "blocks.json")
+            cache = BlockCache(path=path)
+            cache.put("block", ("<p><a href=\"/x\">x</a></p>", [("link", "/x")], ["x"]))
+            cache.save()
+            self.assertEqual(
+                BlockCache.load(path=path).get("block"),
+                ("<p><a href=\"/x\">x</a></p>", [["link", "/x"]], ["x"]),
+            )
+
+    def test_merge_worker_delta(self):
+        worker = BlockCache(record_added=True)
+        worker.get("block")
+        worker.put("block", "<p>block</p>")
+        parent = BlockCache()
+        parent.merge(worker.drain())
+        self.assertEqual(parent.misses, 1)
+        self.assertEqual(parent.get("block"), "<p>block</p>")
+        self.assertEqual(worker.added, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,6 +3,7 @@ import unittest
 from converters import (
     markdown_to_blocks,
     block_to_block_type,
+    classify_block,
     BlockType
 )
 
@@ -61,3 +62,18 @@ This is the same paragraph on a new line
                 BlockType.QUOTE,
             ],
         )
+
+    def test_classify_block_returns_lines(self):
+        self.assertEqual(
+            classify_block("- one\n- two"),
+            (BlockType.UNORDERED_LIST, ["- one", "- two"]),
+        )
+        self.assertEqual(
+            classify_block("1. one\n3. three"),
+            (BlockType.PARAGRAPH, ["1. one", "3. three"]),
+        )
+        self.assertEqual(classify_block("## heading"), (BlockType.HEADING, None))
+
+    def test_broken_list_is_paragraph(self):
+        self.assertEqual(block_to_block_type("- one\nnot a list\n- three"), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type(">quote\nnot a quote"), BlockType.PARAGRAPH)
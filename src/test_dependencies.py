@@ -0,0 +1,67 @@
+import contextlib
+import io
+import os
+import unittest
+
+from manifest import BuildManifest
+from page_generator import generate_pages_recursive
+from render_context import RenderContext
+from test_support import SiteTestCase
+
+
+class TestDependencies(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.index = self.write("index.md", "# Home\n\n![tom](/images/tom.png)")
+        self.about = self.write("about.md", "# About\n\n![tolkien](/images/tolkien.png)")
+
+    def build(self, basepath="/", image_attrs=None):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            generate_pages_recursive(self.content, self.template, self.dest, basepath, self.manifest,
+                                     context=RenderContext(image_attrs=image_attrs), explain=True)
+        self.manifest.save()
+        self.manifest = BuildManifest.load(self.manifest.path)
+        return [line for line in output.getvalue().splitlines() if line.startswith("Rebuilding")]
+
+    def test_new_and_unchanged_pages(self):
+        self.assertEqual(self.build(), [
+            f"Rebuilding {self.about}: new page",
+            f"Rebuilding {self.index}: new page",
+        ])
+        self.assertEqual(self.build(), [])
+
+    def test_recorded_inputs(self):
+        self.build()
+        self.assertEqual(sorted(self.manifest.pages[self.index]["deps"]), [
+            "image:/images/tom.png",
+            "option:basepath",
+            f"source:{self.index}",
+            f"template:{self.template}",
+        ])
+
+    def test_reasons(self):
+        self.build()
+        self.write(self.about, "# About\n\nEdited")
+        self.assertEqual(self.build(), [f"Rebuilding {self.about}: source {self.about} changed"])
+        self.write(self.template, "<main>{{ Content }}</main>")
+        self.assertEqual(self.build("/site/"), [
+            f"Rebuilding {self.about}: basepath changed; template {self.template} changed",
+            f"Rebuilding {self.index}: basepath changed; template {self.template} changed",
+        ])
+        os.remove(os.path.join(self.dest, "index.html"))
+        self.assertEqual(self.build("/site/"), [f"Rebuilding {self.index}: output missing"])
+
+    def test_image_change_rebuilds_only_pages_using_it(self):
+        attrs = {"/images/tom.png": {"width": 100}, "/images/tolkien.png": {"width": 200}}
+        self.build(image_attrs=attrs)
+        attrs["/images/tom.png"] = {"width": 120}
+        self.assertEqual(self.build(image_attrs=attrs), [
+            f"Rebuilding {self.index}: image /images/tom.png changed",
+        ])
+        with open(os.path.join(self.dest, "index.html")) as file:
+            self.assertIn('width="120"', file.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import os
+import unittest
+
+from devserver import SiteWatcher
+from page_generator import generate_pages_recursive
+from render_context import RenderContext
+from search_index import SearchIndex
+from test_support import SiteTestCase
+
+
+class TestDevServer(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        os.makedirs(self.static)
+        self.write("index.md", "# Home\n\nHello")
+        self.write("about.md", "# About\n\nUs")
+        generate_pages_recursive(self.content, self.template, self.dest, "/", self.manifest)
+        self.watcher = SiteWatcher("/", self.manifest, self.content, self.static, self.template, self.dest,
+                                   context=RenderContext(partials_dir=self.partials))
+        self.addCleanup(self.watcher.source.close)
+
+    def write(self, path, text):
+        # Moves the mtime forward so the change is seen even within the filesystem's timestamp granularity.
+        path = super().write(path, text)
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000_000))
+        return path
+
+    def test_poll_without_changes(self):
+        self.assertFalse(self.watcher.poll())
+
+    def test_edit_rebuilds_only_that_page(self):
+        about_mtime = os.stat(os.path.join(self.dest, "about.html")).st_mtime_ns
+        self.write("index.md", "# Home\n\nEdited")
+        self.assertTrue(self.watcher.poll())
+        self.assertIn("Edited", self.read("index.html"))
+        self.assertEqual(about_mtime, os.stat(os.path.join(self.dest, "about.html")).st_mtime_ns)
+
+    def test_template_and_static_changes(self):
+        self.write(self.template, "<main>{{ Content }}</main>")
+        self.write(os.path.join(self.static, "site.css"), "body {}")
+        self.watcher.poll()
+        self.assertTrue(self.read("about.html").startswith("<main>"))
+        self.assertEqual(self.read("site.css"), "body {}")
+
+    def test_rebuild_applies_build_options(self):
+        search = SearchIndex(os.path.join(self.root, "search"), self.dest, shards=1)
+        watcher = SiteWatcher("/", self.manifest, self.content, self.static, self.template, self.dest,
+                              context=RenderContext(search_dir=search.search_dir, partials_dir=self.partials),
+                              static_mode="hardlink", minify=True, precompress=True, search=search,
+                              site_url="https://example.com", feed_section="")
+        self.write("index.md", "# Home\n\nEdited   text")
+        self.write(os.path.join(self.static, "site.css"), "body {\n  margin: 0;\n}\n")
+        watcher.poll()
+        watcher.source.close()
+        self.assertIn("<p>Edited text</p>", self.read("index.html"))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html.gz")))
+        self.assertEqual(self.read("site.css"), "body{margin:0}")
+        self.assertEqual(self.manifest.transformed, {os.path.join(self.dest, "site.css"): "minify_css"})
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "sitemap.xml")))
+        self.assertIn(os.path.join(self.dest, "search", "0.json"), search.outputs())
+
+    def test_rebuild_skips_stages_the_edit_does_not_affect(self):
+        watcher = SiteWatcher("/", self.manifest, self.content, self.static, self.template, self.dest,
+                              context=RenderContext(partials_dir=self.partials), listing_options={"section": "blog"},
+                              site_url="https://example.com")
+        self.addCleanup(watcher.source.close)
+        self.write("blog/post.md", "---\ndate: 2024-01-01\n---\n# Post\n\nBody")
+        watcher.poll()
+        listing, sitemap, feed = (os.path.join(self.dest, name) for name in ("blog/index.html", "sitemap.xml",
+                                                                             "feed.xml"))
+
+        def mtimes():
+            return [os.stat(path).st_mtime_ns for path in (listing, sitemap, feed)]
+
+        before = mtimes()
+        self.write("about.md", "# About\n\nEdited")
+        watcher.poll()
+        self.assertEqual(mtimes(), before)
+        self.write("blog/post.md", "---\ndate: 2024-01-01\n---\n# Post\n\nEdited body")
+        watcher.poll()
+        self.assertEqual(mtimes()[:2], before[:2])
+        self.assertIn("Edited body", self.read("feed.xml"))
+        self.write("blog/post.md", "---\ndate: 2024-01-01\n---\n# Renamed\n\nEdited body")
+        watcher.poll()
+        self.assertEqual(mtimes()[1], before[1])
+        self.assertIn("Renamed", self.read("blog/index.html"))
+        self.write("blog/post.md", "---\ndate: 2024-02-01\n---\n# Renamed\n\nEdited body")
+        watcher.poll()
+        self.assertIn("<lastmod>2024-02-01</lastmod>", self.read("sitemap.xml"))
+
+    def test_rebuild_postprocesses_only_what_it_wrote(self):
+        watcher = SiteWatcher("/", self.manifest, self.content, self.static, self.template, self.dest,
+                              context=RenderContext(partials_dir=self.partials), precompress=True)
+        self.addCleanup(watcher.source.close)
+        self.write("index.md", "# Home\n\nEdited")
+        watcher.poll()
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "about.html.gz")))
+        os.remove(os.path.join(self.content, "index.md"))
+        watcher.poll()
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "index.html.gz")))
+        self.assertEqual(self.manifest.postprocessed, {})
+
+    def test_broken_page_does_not_stop_rebuilds(self):
+        self.write("broken.md", "# Broken\n\n**unbalanced")
+        self.assertTrue(self.watcher.poll())
+        self.write(self.template, "<main>{{ Content }}</main>")
+        self.assertTrue(self.watcher.poll())
+        self.assertTrue(self.read("about.html").startswith("<main>"))
+        self.assertIn(os.path.join(self.content, "about.md"), self.manifest.pages)
+        self.write("broken.md", "# Broken\n\nFixed")
+        self.assertTrue(self.watcher.poll())
+        self.assertEqual(self.read("broken.html"), "<main><div><h1>Broken</h1><p>Fixed</p></div></main>")
+
+    def test_deleted_page_is_removed(self):
+        os.remove(os.path.join(self.content, "about.md"))
+        self.watcher.poll()
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "about.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
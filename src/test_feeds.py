@@ -0,0 +1,75 @@
+import io
+import os
+import unittest
+from xml.etree import ElementTree
+
+from feeds import XmlWriter, extract_content, generate_feeds
+from page_generator import collect_pages, generate_pages_recursive
+from page_index import PageIndex
+from template import CompiledTemplate
+from test_support import SiteTestCase
+
+
+class TestFeeds(SiteTestCase):
+    template_text = '<title>{{ Title }}</title><link href="/a.css" />\n<main>{{ Content }}</main>\n'
+
+    def setUp(self):
+        super().setUp()
+        self.write("index.md", "# Home\n")
+        for day in range(1, 4):
+            self.write(f"blog/post{day}.md", f"---\ndate: 2024-01-0{day}\n---\n# Post {day} & more\n\n[home](/)\n")
+
+    def build(self, max_urls=50000):
+        index = PageIndex.build(collect_pages(self.content, self.dest), self.dest)
+        generate_pages_recursive(self.content, self.template, self.dest, "/base/", self.manifest, index=index)
+        outputs = generate_feeds(self.manifest, index, self.template, self.dest, "/base/", "https://example.com/",
+                                 max_urls=max_urls)
+        return sorted(os.path.relpath(path, self.dest) for path in outputs)
+
+    def parse(self, name):
+        return ElementTree.parse(os.path.join(self.dest, name)).getroot()
+
+    def test_xml_writer_escapes(self):
+        fp = io.StringIO()
+        writer = XmlWriter(fp)
+        writer.start("a", {"title": 'x "y"'})
+        writer.element("b", "1 < 2 & 3")
+        writer.end()
+        self.assertEqual(fp.getvalue(), '<a title=\'x "y"\'><b>1 &lt; 2 &amp; 3</b></a>\n')
+
+    def test_extract_content(self):
+        template = CompiledTemplate("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        html = template.render({"Title": "<main>", "Content": "<p>body</p>"})
+        self.assertEqual(extract_content(html, template), "<p>body</p>")
+        self.assertIsNone(extract_content("<p>minified</p>", template))
+
+    def test_sitemap_and_feed(self):
+        self.assertEqual(self.build(), ["feed.xml", "sitemap.xml"])
+        ns = {"s": "http://www.sitemaps.org/schemas/sitemap/0.9", "a": "http://www.w3.org/2005/Atom"}
+        urls = self.parse("sitemap.xml").findall("s:url", ns)
+        self.assertEqual(urls[0].find("s:loc", ns).text, "https://example.com/base/blog/post1.html")
+        self.assertEqual(urls[0].find("s:lastmod", ns).text, "2024-01-01")
+        self.assertEqual(urls[3].find("s:loc", ns).text, "https://example.com/base/")
+        self.assertIsNone(urls[3].find("s:lastmod", ns))
+
+        feed = self.parse("feed.xml")
+        entries = feed.findall("a:entry", ns)
+        self.assertEqual([entry.find("a:title", ns).text for entry in entries],
+                         ["Post 3 & more", "Post 2 & more", "Post 1 & more"])
+        self.assertEqual(entries[0].find("a:id", ns).text, "https://example.com/base/blog/post3.html")
+        self.assertEqual(entries[0].find("a:content", ns).text,
+                         '<div><h1>Post 3 & more</h1><p><a href="/base/">home</a></p></div>')
+        self.assertEqual(feed.find("a:updated", ns).text, "2024-01-03T00:00:00Z")
+
+    def test_sitemap_split(self):
+        self.assertEqual(self.build(max_urls=2), ["feed.xml", "sitemap-1.xml", "sitemap-2.xml", "sitemap.xml"])
+        ns = {"s": "http://www.sitemaps.org/schemas/sitemap/0.9"}
+        locs = [loc.text for loc in self.parse("sitemap.xml").iter(f"{{{ns['s']}}}loc")]
+        self.assertEqual(locs, ["https://example.com/base/sitemap-1.xml", "https://example.com/base/sitemap-2.xml"])
+        self.assertEqual(len(self.parse("sitemap-2.xml").findall("s:url", ns)), 2)
+        self.assertEqual(self.build(), ["feed.xml", "sitemap.xml"])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "sitemap-1.xml")))
+
+
+if __name__ == "__main__":
+    unittest.main()
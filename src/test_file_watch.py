@@ -0,0 +1,67 @@
+import os
+import shutil
+import unittest
+
+from file_watch import InotifyWatcher, SnapshotWatcher, _libc, diff_snapshots
+from test_support import SiteTestCase
+
+
+class TestFileWatch(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("index.md", "# Home")
+        self.write("blog/post.md", "# Post")
+        self.write(os.path.join(self.root, "notes.txt"), "not watched")
+
+    def open(self, watcher_class):
+        watcher = watcher_class([self.content, self.template, self.partials])
+        self.addCleanup(watcher.close)
+        return watcher
+
+    def test_diff_snapshots(self):
+        changed, deleted = diff_snapshots({"a": (1, 1), "b": (1, 1)}, {"a": (2, 1), "c": (1, 1)})
+        self.assertEqual(changed, ["a", "c"])
+        self.assertEqual(deleted, ["b"])
+
+    def check_changes(self, watcher_class):
+        watcher = self.open(watcher_class)
+        self.assertEqual(watcher.changes(), ([], []))
+        index = self.write("index.md", "# Home, edited")
+        self.write(os.path.join(self.root, "notes.txt"), "still not watched")
+        self.assertEqual(watcher.changes(), ([index], []))
+
+        new_dir = os.path.join(self.content, "new", "deep")
+        page = self.write(os.path.join(new_dir, "page.md"), "# New")
+        self.write(self.partials + ".tmp", "ignored")
+        footer = self.write(os.path.join(self.partials, "footer.md"), "fin")
+        self.assertEqual(watcher.changes(), ([page, footer], []))
+        other = self.write(os.path.join(new_dir, "other.md"), "# Other")
+        self.assertEqual(watcher.changes(), ([other], []))
+
+        replacement = os.path.join(self.root, "template.new")
+        self.write(replacement, "<main>{{ Content }}</main>")
+        os.replace(replacement, self.template)
+        shutil.rmtree(os.path.join(self.content, "blog"))
+        self.assertEqual(watcher.changes(), ([self.template], [os.path.join(self.content, "blog", "post.md")]))
+        self.assertEqual(watcher.changes(), ([], []))
+
+    def test_snapshot_watcher(self):
+        self.check_changes(SnapshotWatcher)
+
+    @unittest.skipIf(_libc is None, "inotify is not available")
+    def test_inotify_watcher(self):
+        self.check_changes(InotifyWatcher)
+
+    @unittest.skipIf(_libc is None, "inotify is not available")
+    def test_inotify_watcher_rescans_after_overflow(self):
+        watcher = self.open(InotifyWatcher)
+        index = self.write("index.md", "# Home, edited")
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        # Read the queued events away, then pretend the kernel dropped them.
+        watcher.read_events()
+        watcher.read_events = lambda: (set(), True)
+        self.assertEqual(watcher.changes(), ([index], [os.path.join(self.content, "blog", "post.md")]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import unittest
+
+from block_cache import BlockCache
+from converters import markdown_to_html, markdown_to_html_node
+from highlight import highlight, highlight_code, parse_info
+from page_generator import init_worker, render_chunk
+from render_context import RenderContext, get_render_context, set_render_context
+from test_support import SiteTestCase
+
+
+PYTHON = """def greet(name):
+    # say hi
+    return f"<b>{name}</b>" if name else None
+"""
+MARKDOWN = f"""# Code
+
+```python
+{PYTHON}```
+
+```
+plain <text>
+```
+
+```brainfuck
++[-->+<]
+```"""
+
+
+class TestHighlight(SiteTestCase):
+    template_text = "<title>{{ Title }}</title>{{ Content }}"
+
+    def setUp(self):
+        super().setUp()
+        self.use_render_context()
+
+    def test_parse_info(self):
+        self.assertEqual(parse_info("py"), "python")
+        self.assertEqual(parse_info("JavaScript title=app.js"), "javascript")
+        self.assertEqual(parse_info("{.sh}"), "bash")
+        self.assertEqual(parse_info('x"onclick'), None)
+        self.assertEqual(parse_info(""), None)
+
+    def test_tokens_are_escaped(self):
+        self.assertEqual(
+            highlight('x = "<a>" # & more', "python"),
+            'x = <span class="tok-string">"&lt;a&gt;"</span> <span class="tok-comment"># &amp; more</span>',
+        )
+        self.assertEqual(highlight("x", "cobol"), None)
+
+    def test_rendered_blocks(self):
+        html = markdown_to_html(MARKDOWN)
+        self.assertIn(
+            '<pre><code class="language-python"><span class="tok-keyword">def</span> greet(name):\n'
+            '    <span class="tok-comment"># say hi</span>\n',
+            html,
+        )
+        self.assertIn("<pre><code>plain <text>\n</code></pre>", html)
+        self.assertIn('<pre><code class="language-brainfuck">+[-->+<]\n</code></pre>', html)
+
+    def test_renderers_agree(self):
+        self.assertEqual(markdown_to_html_node(MARKDOWN).to_html(), markdown_to_html(MARKDOWN))
+
+    def test_cache_hits(self):
+        cache = BlockCache()
+        get_render_context().highlight_cache = cache
+        expected = highlight("let x = 1;", "javascript")
+        self.assertEqual(highlight_code("let x = 1;", "javascript"), expected)
+        self.assertEqual(highlight_code("let x = 1;", "javascript"), expected)
+        self.assertEqual(highlight_code("x", "cobol"), None)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_worker_delta_merges_into_parent(self):
+        source = self.write("index.md", MARKDOWN)
+        init_worker(RenderContext(highlight_cache=BlockCache(16)).worker_options(), False)
+        # The worker's pipeline normally lives as long as its process; here it has to be shut down by hand.
+        self.addCleanup(get_render_context().io_pipeline.close)
+        result = render_chunk([(source, os.path.join(self.dest, "index.html"))], self.template, "/")
+        parent = RenderContext(highlight_cache=BlockCache(maxsize=16))
+        parent.merge(result["caches"])
+        set_render_context(parent)
+        parent = parent.highlight_cache
+        self.assertEqual(highlight_code(PYTHON, "python"), highlight(PYTHON, "python"))
+        self.assertEqual(parent.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
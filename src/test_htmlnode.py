@@ -76,6 +76,11 @@ class TestHTMLNode(unittest.TestCase):
             None,
         )
 
+    def test_compact_nodes(self):
+        node = HTMLNode("p", "test")
+        self.assertFalse(hasattr(node, "__dict__"))
+        self.assertIs(node.tag, HTMLNode("".join(["p"]), "other").tag)
+
 
 if __name__ == "__main__":
     unittest.main()
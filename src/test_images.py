@@ -0,0 +1,84 @@
+import os
+import struct
+import unittest
+import zlib
+
+from converters import text_node_to_html_node
+from images import ImagePipeline, image_size, remove_derived
+from manifest import BuildManifest
+from page_generator import generate_pages_recursive
+from render_context import RenderContext
+from test_support import SiteTestCase
+from textnode import TextNode, TextType
+
+
+def png_bytes(width, height):
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    pixels = zlib.compress(b"".join(b"\x00" + b"\x00" * width for _ in range(height)))
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", pixels) + chunk(b"IEND", b"")
+
+
+class TestImages(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write_png("tom.png", 40, 30)
+        self.context = self.use_render_context()
+
+    def write_png(self, name, width, height):
+        with open(os.path.join(self.static, "images", name), "wb") as file:
+            file.write(png_bytes(width, height))
+
+    def pipeline(self):
+        return ImagePipeline(self.static, self.dest, "/", os.path.join(self.root, "cache"), widths=(20,), workers=1)
+
+    def test_image_size(self):
+        path = os.path.join(self.root, "image")
+        samples = [
+            (png_bytes(7, 5), (7, 5)),
+            (b"GIF89a" + struct.pack("<HH", 9, 4) + b"\x00" * 20, (9, 4)),
+            (b"\xff\xd8\xff\xe0\x00\x04ab\xff\xc0\x00\x11\x08" + struct.pack(">HH", 6, 11), (11, 6)),
+            (b"not an image", None),
+        ]
+        for data, expected in samples:
+            with open(path, "wb") as file:
+                file.write(data)
+            self.assertEqual(image_size(path), expected)
+
+    def test_attrs_on_image_nodes(self):
+        attrs = self.pipeline().run()
+        self.assertEqual(attrs["/images/tom.png"]["width"], "40")
+        self.assertEqual(attrs["/images/tom.png"]["height"], "30")
+        self.context.image_attrs = attrs
+        html = text_node_to_html_node(TextNode("Tom", TextType.IMAGE, "/images/tom.png")).to_html()
+        self.assertTrue(html.startswith('<img src="/images/tom.png" alt="Tom" width="40" height="30"'))
+        self.assertIn('loading="lazy"', html)
+
+    def test_remove_derived(self):
+        variant = os.path.join(self.dest, "images", "tom-20w.png")
+        os.makedirs(os.path.dirname(variant))
+        with open(variant, "wb") as file:
+            file.write(png_bytes(20, 15))
+        manifest = BuildManifest(self.manifest.path, derived=[variant])
+        self.assertEqual(remove_derived(manifest), [variant])
+        self.assertFalse(os.path.exists(variant))
+        self.assertEqual(manifest.derived, [])
+
+    def test_changed_image_rebuilds_referencing_pages(self):
+        self.write("with.md", "# With\n\n![tom](/images/tom.png)")
+        self.write("without.md", "# Without\n\ntext")
+        generate_pages_recursive(self.content, self.template, self.dest, "/", self.manifest,
+                                 context=RenderContext(image_attrs=self.pipeline().run(self.manifest)))
+        before = {name: os.stat(os.path.join(self.dest, name)).st_mtime_ns for name in ("with.html", "without.html")}
+
+        self.write_png("tom.png", 80, 60)
+        generate_pages_recursive(self.content, self.template, self.dest, "/", self.manifest,
+                                 context=RenderContext(image_attrs=self.pipeline().run(self.manifest)))
+        self.assertIn('width="80"', self.read("with.html"))
+        self.assertEqual(before["without.html"], os.stat(os.path.join(self.dest, "without.html")).st_mtime_ns)
+
+
+if __name__ == "__main__":
+    unittest.main()
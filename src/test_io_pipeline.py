@@ -0,0 +1,86 @@
+import contextlib
+import io
+import os
+import unittest
+
+from io_pipeline import IOPipeline, create_dirs
+from page_generator import build_pages, render_pages
+from test_support import SiteTestCase
+
+
+def write_file(path, text):
+    with open(path, "w") as file:
+        file.write(text)
+
+
+class TestIOPipeline(SiteTestCase):
+    def test_reads_are_prefetched_within_window(self):
+        paths = []
+        for i in range(5):
+            paths.append(self.write(f"{i}.md", "x" * (i * 10)))
+        pipeline = IOPipeline(threads=2, window=2, max_bytes=35)
+        pipeline.prefetch(paths)
+        self.assertEqual(sorted(pipeline.reads), paths[:2])
+        self.assertEqual(pipeline.read(paths[0]), "")
+        self.assertEqual(sorted(pipeline.reads), paths[1:3])
+        self.assertEqual([pipeline.read(path) for path in paths[1:]], ["x" * 10, "x" * 20, "x" * 30, None])
+        self.assertEqual(pipeline.close(), {})
+
+    def test_write_failures_are_reported_by_key(self):
+        pipeline = IOPipeline(threads=2, window=1)
+        pipeline.write("good", write_file, os.path.join(self.root, "good.html"), "ok")
+        pipeline.write("bad", write_file, os.path.join(self.root, "missing", "bad.html"), "no")
+        failures = pipeline.close()
+        self.assertEqual(list(failures), ["bad"])
+        self.assertIn("FileNotFoundError", failures["bad"])
+        with open(os.path.join(self.root, "good.html")) as file:
+            self.assertEqual(file.read(), "ok")
+
+    def test_drain_reports_keys_once_all_their_writes_settle(self):
+        pipeline = IOPipeline(threads=2, window=1)
+        pipeline.write("page", write_file, os.path.join(self.root, "page.html"), "ok")
+        pipeline.write("page", write_file, os.path.join(self.root, "page.json"), "{}")
+        self.assertTrue(pipeline.is_pending("page"))
+        pipeline.write("other", write_file, os.path.join(self.root, "missing", "other.html"), "no")
+        self.assertEqual(pipeline.drain(), [("page", None)])
+        settled = pipeline.flush()
+        self.assertEqual([key for key, _ in settled], ["other"])
+        self.assertIn("FileNotFoundError", settled[0][1])
+        self.assertEqual(pipeline.drain(), [])
+        pipeline.close()
+
+    def test_create_dirs(self):
+        outputs = [os.path.join(self.dest, "a", "index.html"), os.path.join(self.dest, "a", "b.html"),
+                   os.path.join(self.dest, "c", "d", "index.html")]
+        self.assertEqual(create_dirs(outputs), [os.path.join(self.dest, "a"), os.path.join(self.dest, "c", "d")])
+        self.assertEqual(create_dirs(outputs), [])
+
+    def test_failed_write_fails_its_page(self):
+        chunk = []
+        for name in ("good", "bad"):
+            chunk.append((self.write(f"{name}.md", f"# {name}"), os.path.join(self.dest, f"{name}.html")))
+        os.makedirs(chunk[1][1])
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            built, failures = build_pages(chunk, self.template, "/")
+        self.assertEqual(list(built), [chunk[0][0]])
+        self.assertEqual(failures, [chunk[1][0]])
+        self.assertIn("IsADirectoryError", output.getvalue())
+        self.assertEqual(sorted(os.listdir(self.dest)), ["bad.html", "good.html"])
+        self.assertEqual(self.read("good.html"), "<div><h1>good</h1></div>")
+
+    def test_failed_pages_release_their_prefetched_reads(self):
+        pages = []
+        for name in ["bad0", "bad1", "bad2", "good0", "good1"]:
+            text = f"# {name}" if name.startswith("good") else "no header"
+            pages.append((self.write(f"{name}.md", text), os.path.join(self.dest, f"{name}.html")))
+        pipeline = IOPipeline(threads=2, window=2)
+        self.addCleanup(pipeline.close)
+        self.use_render_context().io_pipeline = pipeline
+        rendered = list(render_pages(pages, self.template, "/"))
+        self.assertEqual([page["error"] is None for _, _, page in rendered], [False, False, False, True, True])
+        self.assertEqual(pipeline.reads, {})
+        self.assertEqual(list(pipeline.queued), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
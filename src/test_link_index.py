@@ -0,0 +1,44 @@
+import os
+import unittest
+
+from converters import markdown_to_html_node
+from link_index import LinkIndex, is_internal, resolve_target
+from page_generator import generate_pages_recursive
+from test_support import SiteTestCase
+
+
+class TestLinkIndex(SiteTestCase):
+    def test_collect_links_during_parse(self):
+        links = []
+        self.use_render_context().collect(links, None, None)
+        markdown_to_html_node("See [a](/a) and ![b](/b.png)\n\n- [c](https://c.example)")
+        self.assertEqual(links, [("link", "/a"), ("image", "/b.png"), ("link", "https://c.example")])
+
+    def test_is_internal(self):
+        self.assertTrue(is_internal("/blog/tom"))
+        self.assertTrue(is_internal("../tom"))
+        self.assertFalse(is_internal("https://www.boot.dev"))
+        self.assertFalse(is_internal("mailto:me@example.com"))
+        self.assertFalse(is_internal("//cdn.example.com/x.js"))
+        self.assertFalse(is_internal("#top"))
+
+    def test_resolve_target(self):
+        self.assertEqual(resolve_target("/blog/tom/index.html", "../majesty#intro"), "blog/majesty")
+        self.assertEqual(resolve_target("/blog/tom/index.html", "/images/tom.png?v=2"), "images/tom.png")
+        self.assertEqual(resolve_target("/index.html", "/"), "")
+
+    def test_find_broken_after_build(self):
+        self.write(os.path.join(self.dest, "images", "tom.png"), "png")
+        home = self.write("index.md", "# Home\n\n[Tom](/blog/tom) [Missing](/blog/missing) [Out](https://example.com)")
+        tom = self.write("blog/tom/index.md",
+                         "# Tom\n\n![tom](/images/tom.png) ![gone](../../images/gone.png) [home](/)")
+        generate_pages_recursive(self.content, self.template, self.dest, "/", self.manifest)
+        index = LinkIndex.from_manifest(self.manifest, self.dest)
+        self.assertEqual(
+            index.find_broken(),
+            [(tom, "image", "../../images/gone.png"), (home, "link", "/blog/missing")],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import unittest
+
+from listings import generate_listings, paginate, slugify, tag_slugs
+from page_generator import collect_pages
+from page_index import PageIndex
+from test_support import SiteTestCase
+
+
+class TestListings(SiteTestCase):
+    template_text = "<title>{{ Title }}</title>{{ Content }}"
+
+    def setUp(self):
+        super().setUp()
+        for day in range(1, 6):
+            self.add_post(day)
+
+    def add_post(self, day, tags="[news]"):
+        self.write(f"blog/post{day}/index.md", f"---\ndate: 2024-01-{day:02}\ntags: {tags}\n---\n# Post {day}\n")
+
+    def generate(self, basepath="/"):
+        index = PageIndex.build(collect_pages(self.content, self.dest), self.dest)
+        written, _ = generate_listings(index, self.template, self.dest, basepath, self.manifest, per_page=2)
+        return sorted(os.path.relpath(path, self.dest) for path in written)
+
+    def test_paginate_numbers_from_oldest(self):
+        listings = paginate("/blog/", "Blog", [5, 4, 3, 2, 1], 2)
+        self.assertEqual(listings, [
+            ("/blog/", "Blog", [5, 4], None, "/blog/page/2/"),
+            ("/blog/page/1/", "Blog (page 1)", [2, 1], "/blog/page/2/", None),
+            ("/blog/page/2/", "Blog (page 2)", [4, 3], "/blog/page/3/", "/blog/page/1/"),
+            ("/blog/page/3/", "Blog (page 3)", [5], "/blog/", "/blog/page/2/"),
+        ])
+
+    def test_listing_pages(self):
+        self.generate("/base/")
+        front = self.read("blog/index.html")
+        self.assertIn('<li><a href="/base/blog/post5/">Post 5</a> <time datetime="2024-01-05">2024-01-05</time></li>',
+                      front)
+        self.assertIn('<a href="/base/blog/page/2/" rel="next">Older</a>', front)
+        self.assertIn('<a href="/base/tags/news/">news (5)</a>', self.read("tags/index.html"))
+        self.assertIn("Post 1", self.read("tags/news/page/1/index.html"))
+
+    def test_new_post_rewrites_only_changed_pages(self):
+        self.generate()
+        self.assertEqual(self.generate(), [])
+        self.add_post(6, "[]")
+        self.assertEqual(self.generate(), ["blog/index.html", "blog/page/3/index.html"])
+
+    def test_disabled_listings_are_removed(self):
+        self.generate()
+        generate_listings(None, self.template, self.dest, "/", self.manifest)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog", "index.html")))
+        self.assertEqual(self.manifest.listings, {})
+
+    def test_slugify(self):
+        self.assertEqual(slugify("Middle Earth!"), "middle-earth")
+        self.assertEqual(len(slugify("!!")), 8)
+
+    def test_colliding_tag_slugs_are_made_unique(self):
+        slugs = tag_slugs(["C++", "C#", "Rust"])
+        self.assertEqual(slugs["Rust"], "rust")
+        self.assertTrue(slugs["C++"].startswith("c-"))
+        self.assertTrue(slugs["C#"].startswith("c-"))
+        self.assertNotEqual(slugs["C++"], slugs["C#"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import unittest
+
+from manifest import BuildManifest
+from page_generator import generate_pages_recursive
+from test_support import SiteTestCase
+
+
+class TestBuildManifest(SiteTestCase):
+    template_text = "<title>{{ Title }}</title>{{ Content }}"
+
+    def setUp(self):
+        super().setUp()
+        self.write("index.md", "# Home\n\nHello")
+        self.write("blog/post.md", "# Post\n\nWorld")
+
+    def build(self):
+        generate_pages_recursive(self.content, self.template, self.dest, "/", self.manifest)
+        self.manifest.save()
+        self.manifest = BuildManifest.load(self.manifest.path)
+
+    def mtimes(self):
+        outputs = [os.path.join(self.dest, "index.html"), os.path.join(self.dest, "blog", "post.html")]
+        return [os.stat(path).st_mtime_ns for path in outputs]
+
+    def test_unchanged_pages_are_skipped(self):
+        self.build()
+        before = self.mtimes()
+        self.build()
+        self.assertEqual(before, self.mtimes())
+
+    def test_changed_page_is_rebuilt(self):
+        self.build()
+        before = self.mtimes()
+        self.write("blog/post.md", "# Post\n\nChanged")
+        self.build()
+        after = self.mtimes()
+        self.assertEqual(before[0], after[0])
+        with open(os.path.join(self.dest, "blog", "post.html")) as file:
+            self.assertIn("Changed", file.read())
+
+    def test_template_change_rebuilds_everything(self):
+        self.build()
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.build()
+        with open(os.path.join(self.dest, "index.html")) as file:
+            self.assertTrue(file.read().startswith("<h1>Home</h1>"))
+
+    def test_deleted_source_removes_output(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog", "post.html")))
+        self.assertNotIn(os.path.join(self.content, "blog", "post.md"), self.manifest.pages)
+
+    def test_parallel_build_matches_serial(self):
+        for i in range(10):
+            self.write(f"blog/extra{i}.md", f"# Extra {i}\n\n- item **{i}**")
+        generate_pages_recursive(self.content, self.template, self.dest, "/")
+        serial = {}
+        for root, _, files in os.walk(self.dest):
+            for name in files:
+                with open(os.path.join(root, name)) as file:
+                    serial[os.path.join(root, name)] = file.read()
+        generate_pages_recursive(self.content, self.template, self.dest, "/", self.manifest, jobs=4)
+        for path, text in serial.items():
+            with open(path) as file:
+                self.assertEqual(text, file.read())
+
+    def test_failed_page_is_reported_and_not_recorded(self):
+        broken = os.path.join(self.content, "broken.md")
+        self.write(broken, "no title here")
+        with self.assertRaises(Exception) as cm:
+            generate_pages_recursive(self.content, self.template, self.dest, "/", self.manifest, jobs=2)
+        self.assertIn(broken, str(cm.exception))
+        self.assertNotIn(broken, self.manifest.pages)
+        self.assertIn(os.path.join(self.content, "index.md"), self.manifest.pages)
+
+
+if __name__ == "__main__":
+    unittest.main()
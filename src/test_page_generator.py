@@ -0,0 +1,41 @@
+import os
+import unittest
+
+import page_generator
+from converters import iter_blocks, markdown_to_blocks
+from page_generator import generate_page
+from test_support import SiteTestCase
+
+
+class TestStreamingPages(SiteTestCase):
+    template_text = '<title>{{ Title }}</title><link href="/a.css" />{{ Content }}'
+
+    def setUp(self):
+        super().setUp()
+        self.source = self.write(
+            "page.md",
+            "Intro with a [link](/blog)\n\n# The title\n\n- one\n- two\n\n"
+            "```\ncode\n\nwith a blank line\n```\n\n1. a\n2. b\n",
+        )
+
+    def tearDown(self):
+        page_generator.STREAM_THRESHOLD_BYTES = 8 * 1024 * 1024
+
+    def render(self, threshold):
+        page_generator.STREAM_THRESHOLD_BYTES = threshold
+        generate_page(self.source, self.template, os.path.join(self.dest, f"{threshold}.html"), "/base/")
+        return self.read(f"{threshold}.html")
+
+    def test_streaming_matches_in_memory(self):
+        self.assertEqual(self.render(0), self.render(1 << 30))
+
+    def test_iter_blocks_keeps_fenced_blank_lines(self):
+        with open(self.source) as file:
+            blocks = list(iter_blocks(file))
+        self.assertEqual(blocks[3], "```\ncode\n\nwith a blank line\n```")
+        with open(self.source) as file:
+            self.assertEqual(blocks, markdown_to_blocks(file.read()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import unittest
+
+import page_generator
+import page_index
+from manifest import hash_file
+from page_generator import generate_page, generate_pages_recursive
+from page_index import PageIndex, parse_front_matter, scan_page, skip_front_matter, split_front_matter
+from test_support import SiteTestCase
+
+
+POST = """---
+title: "Riddles in the Dark"
+date: 2024-03-01
+tags: [gollum, riddles]
+draft: false
+---
+# Chapter five
+
+What has it got in its pocketses?
+"""
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_parse_front_matter(self):
+        meta = parse_front_matter("title: A: B\ndraft: yes\ntags:\n  - one\n  - 'two'\n# comment\n")
+        self.assertEqual(meta, {"title": "A: B", "draft": True, "tags": ["one", "two"]})
+
+    def test_split_front_matter(self):
+        meta, body = split_front_matter(POST)
+        self.assertEqual(meta["tags"], ["gollum", "riddles"])
+        self.assertTrue(body.startswith("# Chapter five"))
+        self.assertEqual(split_front_matter("# No meta\n---\n"), ({}, "# No meta\n---\n"))
+
+    def test_thematic_break_is_not_front_matter(self):
+        text = "---\nJust a rule above.\n---\n# Title\n"
+        self.assertEqual(parse_front_matter("Just a rule above.\n"), None)
+        self.assertEqual(split_front_matter(text), ({}, text))
+
+    def test_skip_front_matter_matches_split(self):
+        for text in (POST, "# Plain\n", "---\nunclosed: yes\n", "---\nJust a rule.\n---\n# Title\n"):
+            self.assertEqual("".join(skip_front_matter(text.splitlines(True))), split_front_matter(text)[1])
+
+
+class TestPageIndex(SiteTestCase):
+    template_text = "<title>{{ Title }}</title><time>{{ Date }}</time>{{ Content }}"
+
+    def setUp(self):
+        super().setUp()
+        self.write("index.md", "# Home\n\nWelcome home\n")
+        self.write("blog/riddles/index.md", POST)
+        self.write("blog/draft.md", "---\ndate: 2024-05-01\ntags: gollum\ndraft: true\n---\n# Unfinished\n")
+
+    def tearDown(self):
+        page_index.SCAN_CHUNK_SIZE = 1 << 20
+
+    def test_scan_page(self):
+        source = os.path.join(self.content, "blog/riddles/index.md")
+        info = scan_page(source, os.path.join(self.dest, "blog/riddles/index.html"), self.dest)
+        self.assertEqual(info.url, "/blog/riddles/")
+        self.assertEqual(info.title, "Riddles in the Dark")
+        self.assertEqual(info.date, "2024-03-01")
+        self.assertEqual(info.words, 10)
+        self.assertEqual(info.hash, hash_file(source))
+
+    def test_scan_across_chunk_boundaries(self):
+        source = self.write("long.md", "word " * 50 + "\n\n# Late title\n\n" + "more words\n" * 20)
+        expected = scan_page(source, "docs/long.html")
+        for size in (3, 7, 64):
+            page_index.SCAN_CHUNK_SIZE = size
+            self.assertEqual(scan_page(source, "docs/long.html"), expected)
+        self.assertEqual((expected.title, expected.words), ("Late title", 93))
+
+    def test_query_and_tags(self):
+        index = PageIndex.build(page_generator.collect_pages(self.content, self.dest), self.dest)
+        self.assertEqual([info.title for info in index.query()], ["Riddles in the Dark", "Home"])
+        self.assertEqual([info.title for info in index.query(tag="gollum", drafts=True)],
+                         ["Unfinished", "Riddles in the Dark"])
+        self.assertEqual(list(index.tags()), ["gollum", "riddles"])
+
+    def test_render_uses_front_matter(self):
+        source = os.path.join(self.content, "blog/riddles/index.md")
+        outputs = []
+        for threshold in (0, 1 << 30):
+            page_generator.STREAM_THRESHOLD_BYTES = threshold
+            dest = os.path.join(self.dest, f"{threshold}.html")
+            generate_page(source, self.template, dest, "/")
+            with open(dest) as file:
+                outputs.append(file.read())
+        page_generator.STREAM_THRESHOLD_BYTES = 8 * 1024 * 1024
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertTrue(outputs[0].startswith("<title>Riddles in the Dark</title><time>2024-03-01</time>"
+                                              "<div><h1>Chapter five</h1>"))
+
+    def test_drafts_are_skipped(self):
+        generate_pages_recursive(self.content, self.template, self.dest, "/", self.manifest, drafts=True)
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "blog/draft.html")))
+        generate_pages_recursive(self.content, self.template, self.dest, "/", self.manifest)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog/draft.html")))
+        self.assertEqual(sorted(self.manifest.pages), [
+            os.path.join(self.content, "blog/riddles/index.md"),
+            os.path.join(self.content, "index.md"),
+        ])
+
+    def test_unscannable_page_is_reported_not_fatal(self):
+        ruled = self.write("ruled.md", "---\nIntro text\n---\n# Ruled\n")
+        with open(os.path.join(self.content, "broken.md"), "wb") as file:
+            file.write(b"# Bad \xff title\n")
+        with self.assertRaises(Exception) as cm:
+            generate_pages_recursive(self.content, self.template, self.dest, "/", self.manifest)
+        self.assertIn("broken.md", str(cm.exception))
+        self.assertIn(ruled, self.manifest.pages)
+        self.assertIn("<div><p>--- Intro text --- # Ruled</p></div>", self.read("ruled.html"))
+
+
+if __name__ == "__main__":
+    unittest.main()
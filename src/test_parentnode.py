@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from parentnode import ParentNode
@@ -32,6 +33,19 @@ class TestParentNode(unittest.TestCase):
             '<div class="parent"><span class="child">child</span></div>',
         )
 
+    def test_iter_html_chunks(self):
+        parent_node = ParentNode("ul", [ParentNode("li", [LeafNode("b", "one")]), ParentNode("li", [LeafNode(None, "two")])])
+        self.assertEqual(
+            list(parent_node.iter_html()),
+            ["<ul>", "<li>", "<b>one</b>", "</li>", "<li>", "two", "</li>", "</ul>"],
+        )
+
+    def test_write_html(self):
+        parent_node = ParentNode("div", [LeafNode("span", "child", {"class": "child"})], {"class": "parent"})
+        fp = io.StringIO()
+        parent_node.write_html(fp)
+        self.assertEqual(fp.getvalue(), parent_node.to_html())
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,76 @@
+import contextlib
+import io
+import os
+import unittest
+
+from block_cache import BlockCache
+from converters import markdown_to_html, markdown_to_html_node
+from page_generator import generate_pages_recursive
+from render_context import RenderContext
+from test_support import SiteTestCase
+
+
+class TestPartials(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.callout = self.write(os.path.join(self.partials, "callout.md"),
+                                  "> **Note** see [the docs](/docs)\n\n{{< include footer.md >}}")
+        self.write(os.path.join(self.partials, "footer.md"), "_fin_")
+        self.context = self.use_render_context(RenderContext(partials_dir=self.partials))
+
+    def test_include_is_spliced(self):
+        markdown = '# Page\n\n{{< include "callout.md" >}}\n\nAfter'
+        expected = (
+            '<div><h1>Page</h1><blockquote><b>Note</b> see <a href="/docs">the docs</a></blockquote>'
+            "<p><i>fin</i></p><p>After</p></div>"
+        )
+        self.assertEqual(markdown_to_html(markdown), expected)
+        self.assertEqual(markdown_to_html_node(markdown).to_html(), expected)
+
+    def test_links_and_includes_are_collected(self):
+        links = []
+        includes = []
+        self.context.collect(links, None, includes)
+        markdown_to_html("{{< include callout.md >}}")
+        markdown_to_html("{{< include callout.md >}}")
+        self.assertEqual(links, [("link", "/docs"), ("link", "/docs")])
+        self.assertEqual([path for path, _ in includes], [self.callout, os.path.join(self.partials, "footer.md")] * 2)
+
+    def test_edited_partial_is_rendered_again(self):
+        self.context.block_cache = BlockCache()
+        self.assertIn("<i>fin</i>", markdown_to_html("{{< include footer.md >}}"))
+        self.write(os.path.join(self.partials, "footer.md"), "**end**")
+        self.assertEqual(markdown_to_html("{{< include footer.md >}}"), "<div><p><b>end</b></p></div>")
+
+    def test_edited_nested_partial_is_rendered_again(self):
+        self.assertIn("<i>fin</i>", markdown_to_html("{{< include callout.md >}}"))
+        self.write(os.path.join(self.partials, "footer.md"), "**end**")
+        html = markdown_to_html("{{< include callout.md >}}")
+        self.assertIn("<b>end</b>", html)
+        self.assertNotIn("fin", html)
+
+    def test_invalid_includes(self):
+        self.write(os.path.join(self.partials, "loop.md"), "{{< include loop.md >}}")
+        with self.assertRaises(Exception) as cm:
+            markdown_to_html("{{< include loop.md >}}")
+        self.assertIn("Include cycle", str(cm.exception))
+        with self.assertRaises(Exception) as cm:
+            markdown_to_html("{{< include ../secret.md >}}")
+        self.assertIn("outside", str(cm.exception))
+
+    def test_partial_change_rebuilds_only_including_pages(self):
+        index = self.write("index.md", "# Home\n\n{{< include footer.md >}}")
+        self.write("about.md", "# About\n\nUs")
+        generate_pages_recursive(self.content, self.template, self.dest, "/", self.manifest, context=self.context)
+        footer = self.write(os.path.join(self.partials, "footer.md"), "**end**")
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            generate_pages_recursive(self.content, self.template, self.dest, "/", self.manifest, context=self.context,
+                                     explain=True)
+        self.assertIn(f"Rebuilding {index}: partial {footer} changed", output.getvalue())
+        self.assertNotIn("about.md", output.getvalue())
+        self.assertIn("<b>end</b>", self.read("index.html"))
+
+
+if __name__ == "__main__":
+    unittest.main()
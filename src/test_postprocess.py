@@ -0,0 +1,54 @@
+import gzip
+import os
+import unittest
+
+from postprocess import PostProcessor, minify_css, minify_html
+from static_sync import sync_static
+from test_support import SiteTestCase
+
+
+class TestPostProcess(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.page = self.write(
+            os.path.join(self.dest, "index.html"),
+            "<html>\n  <body>\n    <!-- note -->\n    <p>Hello   <b>world</b></p><pre>keep\n  this</pre>\n  </body>\n</html>\n",
+        )
+
+    def test_minify_html(self):
+        with open(self.page) as file:
+            self.assertEqual(
+                minify_html(file.read()),
+                "<html><body><p>Hello <b>world</b></p><pre>keep\n  this</pre></body></html>",
+            )
+
+    def test_minify_css(self):
+        css = "/* theme */\nbody {\n  color: #fff;\n  margin: 0 auto;\n}\n\nh1,\nh2 > a:hover {\n  color: red;\n}\n"
+        self.assertEqual(minify_css(css), "body{color:#fff;margin:0 auto}h1,h2>a:hover{color:red}")
+
+    def test_precompress_and_skip_unchanged(self):
+        processor = PostProcessor(self.manifest, minify=True, compress=True)
+        self.assertEqual(processor.run([self.page], [self.page]), [self.page])
+        with open(self.page, "rb") as file, gzip.open(self.page + ".gz") as compressed:
+            self.assertEqual(file.read(), compressed.read())
+        self.assertEqual(processor.run([self.page], [self.page]), [])
+
+    def test_removed_output_drops_siblings(self):
+        processor = PostProcessor(self.manifest, compress=True)
+        processor.run([self.page])
+        os.remove(self.page)
+        processor.run([])
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+        self.assertEqual(self.manifest.postprocessed, {})
+
+    def test_static_css_minified_once(self):
+        self.write(os.path.join(self.static, "index.css"), "body {\n  margin: 0;\n}\n")
+        transforms = {".css": minify_css}
+        copied, _ = sync_static(self.static, self.dest, self.manifest, transforms=transforms)
+        self.assertEqual(self.read("index.css"), "body{margin:0}")
+        copied, _ = sync_static(self.static, self.dest, self.manifest, transforms=transforms)
+        self.assertEqual(copied, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
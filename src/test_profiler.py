@@ -0,0 +1,55 @@
+import unittest
+
+from converters import markdown_to_html_node
+from page_generator import generate_pages_recursive
+from profiler import BuildProfiler, get_profiler, set_profiler, stage
+from test_support import SiteTestCase
+
+
+class TestProfiler(SiteTestCase):
+    template_text = "{{ Title }}{{ Content }}"
+
+    def tearDown(self):
+        set_profiler(None)
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(get_profiler())
+        with stage("read"):
+            pass
+
+    def test_stages_recorded_per_page(self):
+        profiler = BuildProfiler()
+        set_profiler(profiler)
+        with profiler.page("page.md"):
+            with stage("read"):
+                pass
+            markdown_to_html_node("# Title\n\nSome **text**\n\n- a\n- b")
+        timings = profiler.pages["page.md"]
+        for name in ("read", "markdown_to_blocks", "block_to_block_type", "text_to_textnodes", "html_tree", "total"):
+            self.assertIn(name, timings)
+
+    def test_hooks_and_report(self):
+        seen = []
+        profiler = BuildProfiler()
+        profiler.add_hook(lambda page, timings: seen.append(page))
+        profiler.merge({"a.md": {"total": 0.5}, "b.md": {"total": 2.0}, "(static)": {"total": 1.0}})
+        report = profiler.report(top_n=1)
+        self.assertEqual(seen, ["a.md", "b.md", "(static)"])
+        self.assertEqual(report["pages"], 2)
+        self.assertEqual(report["totals"], {"total": 2.5})
+        self.assertEqual(report["slowest"], [{"page": "b.md", "total": 2.0}])
+
+    def test_parallel_build_profile(self):
+        for i in range(4):
+            self.write(f"{i}.md", f"# Page {i}\n\ntext")
+        profiler = BuildProfiler()
+        set_profiler(profiler)
+        generate_pages_recursive(self.content, self.template, self.dest, "/", jobs=2)
+        self.assertEqual(len(profiler.pages), 4)
+        for timings in profiler.pages.values():
+            for name in ("read", "to_html", "template", "write"):
+                self.assertIn(name, timings)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+
+from converters import (
+    BlockRenderer,
+    TextType,
+    markdown_to_html,
+    markdown_to_html_node,
+)
+from render_context import RenderContext, set_render_context
+
+
+MARKDOWN = """# Heading with `code`
+
+Paragraph with **bold**, _italic_, a [link](/blog) and
+![an image](/images/tom.png) across lines.
+
+> quoted **text**
+> second line
+
+- one
+- [two](https://example.com)
+
+1. first
+2. second
+
+```
+code block
+```"""
+
+
+class PlainTextRenderer(BlockRenderer):
+    def span(self, text_node):
+        return text_node.text if text_node.text_type != TextType.IMAGE else ""
+
+    def paragraph(self, spans):
+        return "".join(spans) + "\n"
+
+    def heading(self, level, spans):
+        return "".join(spans).upper() + "\n"
+
+    def code(self, text, language=None):
+        return text
+
+    def quote(self, lines):
+        return "".join("".join(spans) + "\n" for spans in lines)
+
+    def unordered_list(self, items):
+        return "".join("* " + "".join(spans) + "\n" for spans in items)
+
+    def ordered_list(self, items):
+        return "".join(f"{i}) " + "".join(spans) + "\n" for i, spans in enumerate(items, 1))
+
+    def document(self, blocks):
+        return "".join(blocks)
+
+
+class TestRenderers(unittest.TestCase):
+    def setUp(self):
+        self.context = RenderContext()
+        self.previous_context = set_render_context(self.context)
+
+    def tearDown(self):
+        set_render_context(self.previous_context)
+
+    def test_html_renderer_matches_tree(self):
+        self.assertEqual(markdown_to_html(MARKDOWN), markdown_to_html_node(MARKDOWN).to_html())
+        self.context.image_attrs = {"/images/tom.png": {"width": "10", "height": "20"}}
+        self.assertEqual(markdown_to_html(MARKDOWN), markdown_to_html_node(MARKDOWN).to_html())
+
+    def test_html_renderer_collects_links(self):
+        links = []
+        self.context.collect(links, None, None)
+        markdown_to_html(MARKDOWN)
+        self.assertEqual(links, [("link", "/blog"), ("image", "/images/tom.png"), ("link", "https://example.com")])
+
+    def test_empty_children_raise(self):
+        for markdown in ("", "- \n- a"):
+            with self.assertRaises(ValueError):
+                markdown_to_html_node(markdown).to_html()
+            with self.assertRaises(ValueError):
+                markdown_to_html(markdown)
+
+    def test_custom_renderer(self):
+        self.assertEqual(
+            markdown_to_html("# Title\n\nSome **text** ![x](/x.png)\n\n- a\n- b", PlainTextRenderer()),
+            "TITLE\nSome text \n* a\n* b\n",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
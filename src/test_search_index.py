@@ -0,0 +1,105 @@
+import json
+import os
+import unittest
+
+from block_cache import BlockCache
+from converters import markdown_to_html_node
+from page_generator import collect_pages, generate_pages_recursive
+from page_index import PageIndex
+from render_context import RenderContext
+from search_index import SearchIndex, decode_shard, encode_shard, term_shard, tokenize
+from test_support import SiteTestCase
+
+
+class TestSearchIndex(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.search_dir = os.path.join(self.root, "search")
+        self.write("index.md", "# Home\n\nWelcome to the **Shire**\n")
+        self.write("blog/ring.md", "# The Ring\n\nOne ring, one [Shire](/) and `code`\n\n```\nnot indexed\n```\n")
+
+    def build(self, basepath="/"):
+        index = PageIndex.build(collect_pages(self.content, self.dest), self.dest)
+        context = RenderContext(search_dir=self.search_dir, partials_dir=self.partials)
+        generate_pages_recursive(self.content, self.template, self.dest, basepath, self.manifest, context=context,
+                                 index=index)
+        return SearchIndex(self.search_dir, self.dest, shards=4).update(self.manifest, index, basepath)
+
+    def lookup(self, term):
+        with open(os.path.join(self.dest, "search", f"{term_shard(term, 4)}.json")) as file:
+            return decode_shard(json.load(file)).get(term)
+
+    def read_docs(self):
+        with open(os.path.join(self.dest, "search", "index.json")) as file:
+            return json.load(file)["docs"]
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize(["One ring, ONE", "a ring_bearer"]), {"one": 2, "ring": 1, "ring_bearer": 1})
+
+    def test_shard_round_trip(self):
+        postings = {"ring": [[3, 1], [0, 2]], "ringwraith": [[1, 4]], "shire": [[2, 1]]}
+        entries = encode_shard(postings)
+        self.assertEqual(entries[1], [4, "wraith", [1, 4]])
+        self.assertEqual(entries[0], [0, "ring", [0, 2, 3, 1]])
+        self.assertEqual(decode_shard(entries), {
+            "ring": [[0, 2], [3, 1]], "ringwraith": [[1, 4]], "shire": [[2, 1]],
+        })
+        self.assertEqual(term_shard("a", 1 << 32), 0xe40c292c)
+
+    def test_incremental_update(self):
+        self.assertEqual(self.build(), ([os.path.join(self.content, "blog/ring.md"),
+                                         os.path.join(self.content, "index.md")], []))
+        self.assertEqual(self.lookup("shire"), [[0, 1], [1, 1]])
+        self.assertEqual(self.lookup("one"), [[0, 2]])
+        self.assertIsNone(self.lookup("indexed"))
+        self.assertEqual(self.build(), ([], []))
+
+        os.remove(os.path.join(self.content, "blog/ring.md"))
+        self.write("blog/shire.md", "# The Shire\n\nSecond breakfast\n")
+        self.assertEqual(self.build(), ([os.path.join(self.content, "blog/shire.md")],
+                                        [os.path.join(self.content, "blog/ring.md")]))
+        self.assertIsNone(self.lookup("one"))
+        self.assertEqual(self.lookup("shire"), [[0, 1], [1, 1]])
+        self.assertEqual(self.read_docs(), [["/blog/shire.html", "The Shire"], ["/", "Home"]])
+
+    def test_basepath_change_rewrites_doc_urls(self):
+        self.build()
+        self.assertEqual(self.build("/site/"), ([], []))
+        self.assertEqual(self.read_docs(), [["/site/blog/ring.html", "The Ring"], ["/site/", "Home"]])
+        self.assertEqual(self.lookup("shire"), [[0, 1], [1, 1]])
+
+    def test_terms_from_an_older_source_are_missing(self):
+        self.build()
+        search = SearchIndex(self.search_dir, self.dest, shards=4)
+        self.assertEqual(search.missing_terms(self.manifest.pages), [])
+        self.write("index.md", "# Home\n\nEdited without search\n")
+        generate_pages_recursive(self.content, self.template, self.dest, "/", self.manifest)
+        self.assertEqual(search.missing_terms(self.manifest.pages), [os.path.join(self.content, "index.md")])
+
+    def test_partial_change_is_indexed(self):
+        word = self.write(os.path.join(self.partials, "word.md"), "alpha")
+        index = self.write("index.md", "# Home\n\n{{< include word.md >}}\n")
+        self.build()
+        self.assertEqual(self.lookup("alpha"), [[1, 1]])
+        self.write(word, "omega")
+        self.assertEqual(self.build(), ([index], []))
+        self.assertIsNone(self.lookup("alpha"))
+        self.assertEqual(self.lookup("omega"), [[1, 1]])
+
+    def test_block_cache_keeps_texts(self):
+        markdown = "Same **block** [link](/x)"
+        expected = []
+        context = self.use_render_context()
+        context.collect(None, expected, None)
+        markdown_to_html_node(markdown)
+        context.block_cache = BlockCache()
+        for _ in range(2):
+            texts = []
+            context.collect(None, texts, None)
+            markdown_to_html_node(markdown)
+            self.assertEqual(texts, expected)
+        self.assertEqual(expected, ["Same ", "block", " ", "link"])
+
+
+if __name__ == "__main__":
+    unittest.main()
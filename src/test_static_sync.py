@@ -0,0 +1,78 @@
+import os
+import unittest
+
+from postprocess import minify_css
+from static_sync import sync_file, sync_static
+from test_support import SiteTestCase
+
+
+class TestStaticSync(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.src = os.path.join(self.root, "assets", "static")
+        self.write(os.path.join(self.src, "index.css"), "body {}")
+        self.write(os.path.join(self.src, "images", "deep", "a.png"), "png")
+
+    def test_nested_and_absolute_source(self):
+        copied, _ = sync_static(os.path.abspath(self.src), self.dest, self.manifest)
+        self.assertEqual(
+            sorted(copied),
+            [os.path.join(self.dest, "images", "deep", "a.png"), os.path.join(self.dest, "index.css")],
+        )
+
+    def test_only_changed_files_are_copied(self):
+        sync_static(self.src, self.dest, self.manifest)
+        copied, _ = sync_static(self.src, self.dest, self.manifest)
+        self.assertEqual(copied, [])
+        self.write(os.path.join(self.src, "index.css"), "body { color: red; }")
+        copied, _ = sync_static(self.src, self.dest, self.manifest)
+        self.assertEqual(copied, [os.path.join(self.dest, "index.css")])
+
+    def test_checksum_ignores_touched_files(self):
+        sync_static(self.src, self.dest, self.manifest, checksum=True)
+        os.utime(os.path.join(self.src, "index.css"), ns=(0, 0))
+        copied, _ = sync_static(self.src, self.dest, self.manifest, checksum=True)
+        self.assertEqual(copied, [])
+
+    def test_orphans_are_removed(self):
+        generated = os.path.join(self.dest, "index.html")
+        sync_static(self.src, self.dest, self.manifest)
+        self.write(generated, "<html></html>")
+        os.remove(os.path.join(self.src, "index.css"))
+        _, removed = sync_static(self.src, self.dest, self.manifest)
+        self.assertEqual(removed, [os.path.join(self.dest, "index.css")])
+        self.assertTrue(os.path.exists(generated))
+
+    def test_toggling_a_transform_recopies(self):
+        css = os.path.join(self.dest, "index.css")
+        self.write(os.path.join(self.src, "index.css"), "body {\n  color: red;\n}\n")
+        sync_static(self.src, self.dest, self.manifest)
+        transforms = {".css": minify_css}
+        copied, _ = sync_static(self.src, self.dest, self.manifest, transforms=transforms)
+        self.assertEqual(copied, [css])
+        self.assertEqual(self.manifest.transformed, {css: "minify_css"})
+        copied, _ = sync_static(self.src, self.dest, self.manifest, transforms=transforms)
+        self.assertEqual(copied, [])
+        copied, _ = sync_static(self.src, self.dest, self.manifest)
+        self.assertEqual(copied, [css])
+        self.assertEqual(self.manifest.transformed, {})
+        with open(css) as file:
+            self.assertEqual(file.read(), "body {\n  color: red;\n}\n")
+
+    def test_single_file_sync_records_its_transform(self):
+        css = os.path.join(self.dest, "index.css")
+        sync_file(os.path.join(self.src, "index.css"), css, self.manifest, transforms={".css": minify_css})
+        self.assertEqual((self.manifest.static, self.manifest.transformed), ([css], {css: "minify_css"}))
+        copied, _ = sync_static(self.src, self.dest, self.manifest, transforms={".css": minify_css})
+        self.assertNotIn(css, copied)
+
+    def test_hardlink_mode(self):
+        sync_static(self.src, self.dest, self.manifest, link_mode="hardlink")
+        self.assertTrue(os.path.samefile(
+            os.path.join(self.src, "index.css"),
+            os.path.join(self.dest, "index.css"),
+        ))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+
+from manifest import BuildManifest
+from render_context import RenderContext, set_render_context
+
+
+class SiteTestCase(unittest.TestCase):
+    # A throwaway site in a temporary directory: content/, static/, partials/, docs/, template.html and a
+    # manifest. Only content/ and the template exist up front.
+    template_text = "{{ Content }}"
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.partials = os.path.join(self.root, "partials")
+        self.dest = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.manifest = BuildManifest(os.path.join(self.root, "manifest.json"))
+        os.makedirs(self.content)
+        self.write(self.template, self.template_text)
+
+    def write(self, path, text):
+        # Relative paths are pages under content/.
+        path = os.path.join(self.content, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(text)
+        return path
+
+    def read(self, path):
+        with open(os.path.join(self.dest, path)) as file:
+            return file.read()
+
+    def use_render_context(self, context=None):
+        if context is None:
+            context = RenderContext()
+        self.addCleanup(set_render_context, set_render_context(context))
+        return context
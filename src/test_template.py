@@ -0,0 +1,45 @@
+import os
+import tempfile
+import time
+import unittest
+
+from template import CompiledTemplate, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile_segments(self):
+        template = CompiledTemplate("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.assertEqual(template.segments, ["<title>", "</title><body>", "</body>"])
+        self.assertEqual(template.slots, ["Title", "Content"])
+
+    def test_render_with_basepath(self):
+        template = CompiledTemplate('<link href="/index.css" /><img src="/a.png" />{{ Content }}', "/site/")
+        self.assertEqual(
+            template.render({"Content": '<a href="/x">x</a>'}),
+            '<link href="/site/index.css" /><img src="/site/a.png" /><a href="/x">x</a>',
+        )
+
+    def test_render_chunks_and_extra_placeholders(self):
+        template = CompiledTemplate("{{ Title }}|{{ Date }}|{{ Content }}|{{ Unknown }}")
+        self.assertEqual(
+            template.render({"Title": "T", "Date": "2024-01-01", "Content": iter(["<p>", "x", "</p>"])}),
+            "T|2024-01-01|<p>x</p>|{{ Unknown }}",
+        )
+
+    def test_load_template_cached_until_modified(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as file:
+                file.write("a{{ Content }}")
+            first = load_template(path)
+            self.assertIs(first, load_template(path))
+            with open(path, "w") as file:
+                file.write("b{{ Content }}!")
+            os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000_000))
+            second = load_template(path)
+            self.assertIsNot(first, second)
+            self.assertEqual(second.render({"Content": "x"}), "bx!")
+
+
+if __name__ == "__main__":
+    unittest.main()
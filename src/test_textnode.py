@@ -39,6 +39,10 @@ class TestTextNode(unittest.TestCase):
             "TextNode(This is a text node, text, https://www.boot.dev)", repr(node)
         )
 
+    def test_compact(self):
+        node = TextNode("This is a text node", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+
     def test_text_to_html(self):
         node = TextNode("This is a text node", TextType.TEXT)
         html_node = text_node_to_html_node(node)
@@ -207,6 +211,29 @@ class TestTextNode(unittest.TestCase):
             new_nodes,
         )
 
+    def test_text_to_textnodes_link_url_with_underscores(self):
+        new_nodes = text_to_textnodes("See [the wiki](https://en.wikipedia.org/wiki/J._R._R._Tolkien) for _more_")
+        self.assertListEqual(
+            [
+                TextNode("See ", TextType.TEXT),
+                TextNode("the wiki", TextType.LINK, "https://en.wikipedia.org/wiki/J._R._R._Tolkien"),
+                TextNode(" for ", TextType.TEXT),
+                TextNode("more", TextType.ITALIC),
+            ],
+            new_nodes,
+        )
+
+    def test_text_to_textnodes_literal_brackets(self):
+        new_nodes = text_to_textnodes("Not a [link] or an ![image] but * and ! are fine")
+        self.assertListEqual(
+            [TextNode("Not a [link] or an ![image] but * and ! are fine", TextType.TEXT)],
+            new_nodes,
+        )
+
+    def test_text_to_textnodes_unmatched_delimiter(self):
+        with self.assertRaises(Exception) as cm:
+            text_to_textnodes("This is **unbalanced")
+        self.assertEqual(str(cm.exception), "Invalid markdown syntax: Not every delimiter '**' was matched!")
 
 
 if __name__ == "__main__":